@@ -0,0 +1,74 @@
+from typing import Optional
+from app.services.email_service import EmailService, create_smtp_client
+from app.services.jwt_service import reload_keyset
+from app.utils.smtp_connection import SMTPClient
+from app.utils.template_manager import TemplateManager
+from settings.config import Settings, settings
+
+
+class AppContainer:
+    """
+    Application-scoped objects, built once per process and shared by every request.
+
+    The dependency functions in `app.dependencies` hand these out, so settings parsing,
+    template compilation and SMTP session setup stay off the request path. The container
+    is started and closed by the application's startup and shutdown events.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._template_manager: Optional[TemplateManager] = None
+        self._smtp_client: Optional[SMTPClient] = None
+        self._email_service: Optional[EmailService] = None
+
+    @property
+    def template_manager(self) -> TemplateManager:
+        if self._template_manager is None:
+            self._template_manager = TemplateManager()
+        return self._template_manager
+
+    @property
+    def smtp_client(self) -> SMTPClient:
+        if self._smtp_client is None:
+            self._smtp_client = create_smtp_client()
+        return self._smtp_client
+
+    @property
+    def email_service(self) -> EmailService:
+        if self._email_service is None:
+            self._email_service = EmailService(template_manager=self.template_manager, smtp_client=self.smtp_client)
+        return self._email_service
+
+    def start(self):
+        """Build the shared services eagerly so the first request does not pay for it."""
+        reload_keyset()
+        self.template_manager.precompile()
+        self.email_service
+
+    async def close(self):
+        if self._smtp_client is not None:
+            await self._smtp_client.close()
+        self._template_manager = None
+        self._smtp_client = None
+        self._email_service = None
+
+    async def reload(self):
+        """
+        Re-read `.env` and the environment, the token signing keys, and rebuild the shared
+        services.
+
+        Settings are refreshed in place, so modules holding a reference to the settings
+        object see the new values; the rate limit budgets, the read-your-writes window and
+        the email outbox worker read them as they go. What is built once at startup keeps
+        its configuration until the process restarts: the database engines and pools, the
+        caches and their shared stores, the rate limit store, and the round-trip header.
+        """
+        fresh = Settings()
+        for field in Settings.model_fields:
+            setattr(self.settings, field, getattr(fresh, field))
+        TemplateManager._compiled.clear()
+        await self.close()
+        self.start()
+
+
+container = AppContainer(settings)
@@ -1,21 +1,258 @@
+from builtins import Exception, ValueError, bool, dict, float, getattr, isinstance, int, len, list, max, min, next, range, setattr, str
+from abc import ABC, abstractmethod
+import itertools
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from settings.config import Settings
 
 Base = declarative_base()
+logger = logging.getLogger(__name__)
+
+
+class PoolCheckoutStats:
+    """Accumulates how long requests wait to check a connection out of the pool."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False):
+        if timed_out:
+            self.timeouts += 1
+            return
+        self.checkouts += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": (self.total_wait_seconds / self.checkouts * 1000) if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times in `checkout_stats`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = PoolCheckoutStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.checkout_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.checkout_stats.record(time.perf_counter() - started)
+        return connection
+
+
+ROUND_TRIP_KINDS = ("statements", "begins", "commits", "rollbacks")
+
+
+class RoundTripCounter:
+    """Database round trips made by one unit of work (usually a request), by kind."""
+
+    def __init__(self):
+        self.statements = self.begins = self.commits = self.rollbacks = 0
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.begins + self.commits + self.rollbacks
+
+    def as_dict(self) -> dict:
+        return {kind: getattr(self, kind) for kind in ROUND_TRIP_KINDS}
+
+
+class RoundTripStats:
+    """Accumulates per-request round trip counts, to show what each request costs the database."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.max_per_request = 0
+        self.totals = RoundTripCounter()
+
+    def record(self, counter: RoundTripCounter):
+        self.requests += 1
+        self.max_per_request = max(self.max_per_request, counter.total)
+        for kind in ROUND_TRIP_KINDS:
+            setattr(self.totals, kind, getattr(self.totals, kind) + getattr(counter, kind))
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "avg_per_request": self.totals.total / self.requests if self.requests else 0.0,
+            "max_per_request": self.max_per_request,
+            **self.totals.as_dict(),
+        }
+
+
+_round_trip_counter: ContextVar[Optional[RoundTripCounter]] = ContextVar("db_round_trip_counter", default=None)
+
+
+@contextmanager
+def count_round_trips() -> Iterator[RoundTripCounter]:
+    """Count the round trips made by the enclosed code, including tasks it starts."""
+    counter = RoundTripCounter()
+    token = _round_trip_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _round_trip_counter.reset(token)
+
+
+def _round_trip_listener(kind: str):
+    def listener(*args, **kwargs):
+        counter = _round_trip_counter.get()
+        if counter is not None:
+            setattr(counter, kind, getattr(counter, kind) + 1)
+    return listener
+
+
+_ROUND_TRIP_LISTENERS = {
+    "before_cursor_execute": _round_trip_listener("statements"),
+    "begin": _round_trip_listener("begins"),
+    "commit": _round_trip_listener("commits"),
+    "rollback": _round_trip_listener("rollbacks"),
+}
+
+
+def instrument_round_trips(engine):
+    """Count the statements and transaction control commands an engine sends, see `count_round_trips`."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    for name, listener in _ROUND_TRIP_LISTENERS.items():
+        if not event.contains(sync_engine, name, listener):
+            event.listen(sync_engine, name, listener)
+
+
+class ReplicaBalancer(ABC):
+    """Chooses which replica serves the next read session."""
+
+    @abstractmethod
+    def choose(self, engines: list) -> int:
+        """Return the index in `engines` of the replica to use."""
+
+
+class RoundRobinBalancer(ReplicaBalancer):
+    def __init__(self):
+        self._next = itertools.count()
+
+    def choose(self, engines: list) -> int:
+        return next(self._next) % len(engines)
+
+
+class RandomBalancer(ReplicaBalancer):
+    def choose(self, engines: list) -> int:
+        return random.randrange(len(engines))
+
+
+class LeastBusyBalancer(ReplicaBalancer):
+    """Picks the replica whose pool has the fewest connections checked out."""
+
+    def choose(self, engines: list) -> int:
+        return min(range(len(engines)), key=lambda index: engines[index].pool.checkedout())
+
+
+REPLICA_BALANCERS = {
+    "round_robin": RoundRobinBalancer,
+    "random": RandomBalancer,
+    "least_busy": LeastBusyBalancer,
+}
+
 
 class Database:
     """Handles database connections and sessions."""
     _engine = None
     _session_factory = None
+    _replica_engines = []
+    _replica_session_factories = []
+    _replica_balancer: ReplicaBalancer = RoundRobinBalancer()
+    round_trip_stats = RoundTripStats()
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
-        """Initialize the async engine and sessionmaker."""
+    def initialize(cls, database_url: str, echo: bool = False, settings: Optional[Settings] = None, replica_urls: Optional[List[str]] = None):
+        """
+        Initialize the async engine and sessionmaker, tuning the pool and driver from settings.
+        Read replicas, when given, get their own engines with the same tuning.
+        """
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
-            cls._session_factory = sessionmaker(
-                bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
-            )
+            cls._engine = cls._create_engine(database_url, echo, settings)
+            cls._session_factory = cls._create_session_factory(cls._engine)
+            cls._replica_engines = [cls._create_engine(url, echo, settings) for url in replica_urls or []]
+            cls._replica_session_factories = [cls._create_session_factory(engine, replica=True) for engine in cls._replica_engines]
+            if settings:
+                cls._replica_balancer = REPLICA_BALANCERS[settings.database_replica_balancing]()
+
+    @classmethod
+    def _create_engine(cls, database_url: str, echo: bool, settings: Optional[Settings]):
+        engine_options = cls.engine_options(database_url, settings) if settings else {}
+        engine = create_async_engine(database_url, echo=echo, future=True, **engine_options)
+        instrument_round_trips(engine)
+        return engine
+
+    @staticmethod
+    def _create_session_factory(engine, replica: bool = False):
+        # Sessions record whether they read from a replica, whose rows may lag the primary
+        return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, future=True, info={"replica": replica})
+
+    @classmethod
+    def engine_options(cls, database_url: str, settings: Settings) -> dict:
+        """Build `create_async_engine` keyword arguments for the pool and the asyncpg driver."""
+        options = {
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+        }
+        if make_url(database_url).get_driver_name() != "asyncpg":
+            return options
+
+        server_settings = {"application_name": settings.db_application_name}
+        if settings.db_pgbouncer_mode:
+            # PgBouncer in transaction mode hands each transaction to an arbitrary server
+            # connection, so named prepared statements cannot be reused and must not collide.
+            # It also rejects unknown startup parameters, so only application_name is sent.
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+            if settings.db_statement_timeout_ms:
+                logger.warning("db_statement_timeout_ms is ignored in PgBouncer mode; set statement_timeout on the database role instead.")
+        else:
+            connect_args = {
+                "statement_cache_size": settings.db_statement_cache_size,
+                "prepared_statement_cache_size": settings.db_statement_cache_size,
+            }
+            if settings.db_statement_timeout_ms:
+                server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+        connect_args["server_settings"] = server_settings
+        options["connect_args"] = connect_args
+        return options
 
     @classmethod
     def get_session_factory(cls):
@@ -23,3 +260,41 @@ class Database:
         if cls._session_factory is None:
             raise ValueError("Database not initialized. Call `initialize()` first.")
         return cls._session_factory
+
+    @classmethod
+    def has_replicas(cls) -> bool:
+        return bool(cls._replica_session_factories)
+
+    @classmethod
+    def get_replica_session_factory(cls):
+        """
+        Returns a session factory bound to a read replica chosen by the balancing policy,
+        or the primary's factory when no replicas are configured.
+        """
+        if not cls._replica_session_factories:
+            return cls.get_session_factory()
+        index = cls._replica_balancer.choose(cls._replica_engines)
+        return cls._replica_session_factories[index]
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        """Current pool occupancy and checkout wait statistics, for sizing pools per worker."""
+        if cls._engine is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        stats = cls._engine_pool_stats(cls._engine)
+        if cls._replica_engines:
+            stats["replicas"] = [cls._engine_pool_stats(engine) for engine in cls._replica_engines]
+        return stats
+
+    @staticmethod
+    def _engine_pool_stats(engine) -> dict:
+        pool = engine.pool
+        stats = {"status": pool.status()}
+        if isinstance(pool, InstrumentedAsyncQueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                checkout_wait=pool.checkout_stats.as_dict(),
+            )
+        return stats
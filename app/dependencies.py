@@ -1,31 +1,94 @@
 from builtins import Exception, dict, str
-from fastapi import Depends, HTTPException
+from typing import Optional
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 from app.database import Database
-from app.utils.template_manager import TemplateManager
+from app.container import container
 from app.services.email_service import EmailService
-from app.services.jwt_service import decode_token
-from settings.config import Settings
-from fastapi import Depends
+from app.services.jwt_service import verify_token
+from app.utils.smtp_connection import SMTPClient
+from app.utils.ttl_cache import TTLCache
+from settings.config import Settings, settings
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
 
 def get_settings() -> Settings:
     """Return application settings."""
-    return Settings()
+    return container.settings
+
+def get_smtp_client() -> SMTPClient:
+    """Return the process-wide SMTP client, so pooled sessions outlive a single request."""
+    return container.smtp_client
 
 def get_email_service() -> EmailService:
-    template_manager = TemplateManager()
-    return EmailService(template_manager=template_manager)
+    return container.email_service
+
+# Users who recently wrote, so their follow-up reads see their own writes despite replica lag.
+# Entries take the window current when they are set, so a configuration reload applies to them.
+# The pins live in this worker's memory: a read served by another worker is not pinned.
+_recent_writers = TTLCache(ttl_seconds=settings.read_your_writes_seconds, maxsize=100_000)
+
+def _client_key(request: Request) -> Optional[str]:
+    """
+    Identify the client by the subject of its bearer token, which stays the same across
+    the tokens it is issued; None when it has no valid token.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    payload = verify_token(token) if scheme.lower() == "bearer" and token else None
+    return payload.get("sub") if payload else None
+
+def pin_reads_to_primary(subject: str):
+    """Serve `subject`'s reads from the primary for the read-your-writes window, in this worker."""
+    _recent_writers.set(subject, True, ttl_seconds=get_settings().read_your_writes_seconds)
 
-async def get_db() -> AsyncSession:
-    """Dependency that provides a database session for each request."""
+async def get_db(request: Request) -> AsyncSession:
+    """
+    Dependency that provides a database session on the primary for each request.
+
+    The request is one unit of work: reads do not commit, so everything the request does
+    runs in a single transaction, which is committed once when the route returns and
+    rolled back if it fails. Services may still commit earlier where a write must be
+    durable before the request goes on.
+    """
+    subject = _client_key(request) if request.method not in SAFE_METHODS else None
+    if subject is not None:
+        pin_reads_to_primary(subject)
     async_session_factory = Database.get_session_factory()
     async with async_session_factory() as session:
         try:
             yield session
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-        
+            if session.in_transaction():
+                await session.commit()
+        except Exception:
+            # The app's exception handlers turn the original error into a response
+            await session.rollback()
+            raise
+
+def get_read_session_factory(request: Request) -> sessionmaker:
+    """
+    Dependency that provides the session factory for read-only work: a replica chosen by the
+    balancing policy, unless the authenticated user wrote within the read-your-writes window
+    through this worker, in which case it stays on the primary. Streaming responses use it to open sessions of their own,
+    since a request's session is closed before the response body is sent.
+    """
+    if Database.has_replicas():
+        subject = _client_key(request)
+        if subject is None or _recent_writers.get(subject) is None:
+            return Database.get_replica_session_factory()
+    return Database.get_session_factory()
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Dependency that provides a database session for read-only routes, see
+    `get_read_session_factory`. Nothing is committed; closing the session ends its
+    transaction with a rollback.
+    """
+    async_session_factory = get_read_session_factory(request)
+    async with async_session_factory() as session:
+        yield session
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
@@ -35,7 +98,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_token(token)
+    payload = verify_token(token)
     if payload is None:
         raise credentials_exception
     user_id: str = payload.get("sub")
@@ -2,9 +2,15 @@ from builtins import Exception
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from app.database import Database
-from app.dependencies import get_settings
-from app.routers import user_routes
+from app.container import container
+from app.dependencies import get_email_service, get_settings
+from app.middleware import RateLimitMiddleware, RoundTripMiddleware, rate_limiter
+from app.routers import jwks_routes, metrics_routes, user_routes
+from app.services.email_outbox_service import EmailOutboxWorker
+from app.services.refresh_token_service import RefreshTokenPurgeWorker
 from app.utils.api_description import getDescription
+from app.utils.json_response import FastJSONResponse
+from app.utils.security import PasswordHashingBusyError, shutdown_password_pool
 app = FastAPI(
     title="User Management",
     description=getDescription(),
@@ -15,17 +21,48 @@ app = FastAPI(
         "email": "support@example.com",
     },
     license_info={"name": "MIT", "url": "https://opensource.org/licenses/MIT"},
+    default_response_class=FastJSONResponse,
 )
 
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    replica_urls = [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()]
+    Database.initialize(settings.database_url, settings.debug, settings, replica_urls)
+    container.start()
+    if settings.email_outbox_worker_enabled:
+        app.state.email_outbox_worker = EmailOutboxWorker(Database.get_session_factory(), get_email_service)
+        app.state.email_outbox_worker.start()
+    if settings.refresh_token_purge_interval_seconds > 0:
+        app.state.refresh_token_purge_worker = RefreshTokenPurgeWorker(Database.get_session_factory())
+        app.state.refresh_token_purge_worker.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if getattr(app.state, "email_outbox_worker", None) is not None:
+        await app.state.email_outbox_worker.stop()
+    if getattr(app.state, "refresh_token_purge_worker", None) is not None:
+        await app.state.refresh_token_purge_worker.stop()
+    await container.close()
+    shutdown_password_pool()
+
+@app.exception_handler(PasswordHashingBusyError)
+async def password_hashing_busy_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Server is busy, please retry shortly."},
+        headers={"Retry-After": "1"},
+    )
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
     return JSONResponse(status_code=500, content={"message": "An unexpected error occurred."})
 
+app.add_middleware(RoundTripMiddleware, header=get_settings().db_round_trips_header or None)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, settings=get_settings())
+
 app.include_router(user_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(jwks_routes.router)
 
 
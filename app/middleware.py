@@ -0,0 +1,145 @@
+"""
+ASGI middleware of the application.
+
+These are plain ASGI callables rather than `BaseHTTPMiddleware` subclasses, so they add no
+task or response buffering of their own and context variables they set reach the endpoint.
+"""
+
+from builtins import ValueError, dict, isinstance, len, str
+import json
+import math
+from typing import Optional, Tuple
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.database import Database, count_round_trips
+from app.utils.rate_limit import LocalRateLimitStore, RateBudget, RateLimiter, create_rate_limit_store
+from settings.config import Settings, settings
+
+
+class RoundTripMiddleware:
+    """
+    Count the database round trips of each request into `Database.round_trip_stats`, and
+    report them in the `header` response header when one is given.
+    """
+
+    def __init__(self, app: ASGIApp, header: Optional[str] = None):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with count_round_trips() as counter:
+            async def send_with_header(message: Message):
+                # Dependencies have exited by the time the response starts, so the final commit is included
+                if message["type"] == "http.response.start" and self.header:
+                    MutableHeaders(scope=message).append(self.header, str(counter.total))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_header)
+            finally:
+                Database.round_trip_stats.record(counter)
+
+
+# Routes that hash a password on every request, and the field naming the account they act on
+EXPENSIVE_ROUTES = {("POST", "/login/"): "username", ("POST", "/register/"): "email"}
+
+# Larger bodies are not buffered to find the account; they are still limited per address
+MAX_ACCOUNT_BODY_BYTES = 16384
+
+rate_limiter = RateLimiter(
+    shared=create_rate_limit_store(settings.rate_limit_store_url),
+    local=LocalRateLimitStore(maxsize=settings.rate_limit_local_buckets),
+)
+
+
+def _account_from_body(body: bytes, content_type: str, field: str) -> Optional[str]:
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            values = parse_qs(body.decode("utf-8")).get(field)
+            value = values[0] if values else None
+        elif content_type.startswith("application/json"):
+            data = json.loads(body)
+            value = data.get(field) if isinstance(data, dict) else None
+        else:
+            return None
+    except ValueError:
+        return None
+    return value.strip().lower() if isinstance(value, str) and value.strip() else None
+
+
+class RateLimitMiddleware:
+    """
+    Token-bucket limits checked before routing, so a rejected request costs no query and
+    no password hash. Every request draws from its client address's
+    `rate_limit_per_minute` budget. Routes in EXPENSIVE_ROUTES draw from the smaller
+    `rate_limit_auth_per_minute` per address instead, and from
+    `rate_limit_auth_account_per_minute` per account named in the body, so neither one
+    address nor many addresses can grind through one account's passwords.
+    Rejections are `429 Too Many Requests` with `Retry-After`.
+
+    Budgets and switches are read from `settings` on every request, so a configuration
+    reload applies to the next request.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter, settings: Settings):
+        self.app = app
+        self.limiter = limiter
+        self.settings = settings
+
+    def _client_address(self, scope: Scope) -> str:
+        if self.settings.rate_limit_trust_forwarded_for:
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                # The nearest proxy appends the address it saw; earlier entries are client-supplied
+                return forwarded.split(",")[-1].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.settings.rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+        address = self._client_address(scope)
+        account_field = EXPENSIVE_ROUTES.get((scope["method"], scope["path"]))
+        if account_field is None:
+            wait = await self.limiter.hit(f"ip:{address}", RateBudget(self.settings.rate_limit_per_minute))
+        else:
+            wait = await self.limiter.hit(f"ip:{address}:{scope['path']}", RateBudget(self.settings.rate_limit_auth_per_minute))
+        if wait == 0 and account_field is not None:
+            receive, body = await self._buffer_body(receive)
+            account = _account_from_body(body, Headers(scope=scope).get("content-type", ""), account_field) if body else None
+            if account is not None:
+                wait = await self.limiter.hit(f"account:{account}:{scope['path']}", RateBudget(self.settings.rate_limit_auth_account_per_minute))
+        if wait > 0:
+            response = JSONResponse(
+                status_code=429,
+                content={"message": "Too many requests, please retry later."},
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    async def _buffer_body(self, receive: Receive) -> Tuple[Receive, Optional[bytes]]:
+        """Read the request body for inspection and return a `receive` that replays it; None if too large."""
+        messages = []
+        size = 0
+        more_body = True
+        while more_body and size <= MAX_ACCOUNT_BODY_BYTES:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            size += len(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = None if more_body else b"".join(message.get("body", b"") for message in messages if message["type"] == "http.request")
+
+        async def replay() -> Message:
+            return messages.pop(0) if messages else await receive()
+
+        return replay, body
@@ -0,0 +1,53 @@
+from builtins import int, str
+from datetime import datetime
+from enum import Enum
+import uuid
+from sqlalchemy import (
+    Column, String, Integer, DateTime, Index, Text, func, Enum as SQLAlchemyEnum
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class EmailOutboxStatus(Enum):
+    """Delivery state of an outbox email, stored as ENUM in the database."""
+    PENDING = "PENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+
+class EmailOutbox(Base):
+    """
+    An email waiting to be delivered, written in the same transaction as the change that
+    triggered it and delivered later by the outbox worker.
+
+    Attributes:
+        id (UUID): Unique identifier for the email.
+        email_type (str): Template name, e.g. 'email_verification'.
+        recipient (str): Address the email is sent to.
+        context (dict): Values substituted into the template when it is rendered.
+        status (EmailOutboxStatus): PENDING until sent, SENT once delivered, DEAD after the last failed attempt.
+        attempts (int): Number of delivery attempts made so far.
+        next_attempt_at (datetime): Earliest time the email may be claimed; also serves as the
+            lease expiry while a worker holds it.
+        last_error (str): Error message of the most recent failed attempt.
+        created_at (datetime): Timestamp when the email was queued, set by the server.
+        sent_at (datetime): Timestamp of successful delivery.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    email_type: Mapped[str] = Column(String(50), nullable=False)
+    recipient: Mapped[str] = Column(String(255), nullable=False)
+    context: Mapped[dict] = Column(JSONB, nullable=False, default=dict)
+    status: Mapped[EmailOutboxStatus] = Column(SQLAlchemyEnum(EmailOutboxStatus, name='EmailOutboxStatus', create_constraint=False), default=EmailOutboxStatus.PENDING, nullable=False)
+    attempts: Mapped[int] = Column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error: Mapped[str] = Column(Text, nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<EmailOutbox {self.email_type} to {self.recipient}, Status: {self.status.name}>"
@@ -0,0 +1,38 @@
+from builtins import bytes, str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, LargeBinary, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class RefreshToken(Base):
+    """
+    A refresh token issued at login, stored only as the SHA-256 digest of the opaque token.
+
+    Each refresh consumes the presented token and issues a successor in the same family.
+    Presenting a consumed token again means it leaked, so the whole family is revoked.
+    Rows are deleted by `RefreshTokenService.purge` once expired or revoked for longer than
+    `refresh_token_retention_minutes`.
+
+    Attributes:
+        token_hash (bytes): SHA-256 digest of the token; the primary key, so lookups are one index probe.
+        family_id (UUID): Shared by a login's token and all tokens rotated from it.
+        user_id (UUID): The user the token was issued to.
+        expires_at (datetime): After this time the token is no longer accepted.
+        used_at (datetime): When the token was exchanged for a successor.
+        revoked_at (datetime): When the token's family was revoked.
+        created_at (datetime): Timestamp when the token was issued, set by the server.
+    """
+    __tablename__ = "refresh_tokens"
+
+    token_hash: Mapped[bytes] = Column(LargeBinary(32), primary_key=True)
+    family_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    used_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken family {self.family_id} of user {self.user_id}>"
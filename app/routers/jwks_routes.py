@@ -0,0 +1,25 @@
+"""
+Publication of the public keys that verify our access tokens.
+
+Other services fetch the JWKS document once, cache it for the advertised max-age and then
+verify tokens locally by their `kid` header, without calling back to this service.
+"""
+
+from fastapi import APIRouter, Response
+from app.services.jwt_service import get_keyset, signing_algorithm
+from app.utils.jwt_keys import ASYMMETRIC_ALGORITHMS
+from settings.config import settings
+
+router = APIRouter()
+
+
+@router.get("/.well-known/jwks.json", name="jwks", tags=["Login and Registration"])
+async def get_jwks(response: Response):
+    """
+    Return the JSON Web Key Set of the token signing keys, including keys published ahead of
+    a rotation and keys still in their grace period. Empty when tokens use a shared secret.
+    """
+    response.headers["Cache-Control"] = f"public, max-age={settings.jwks_max_age_seconds}"
+    if signing_algorithm() not in ASYMMETRIC_ALGORITHMS:
+        return {"keys": []}
+    return get_keyset().jwks()
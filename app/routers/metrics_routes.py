@@ -0,0 +1,48 @@
+"""
+Operational endpoints for the running worker.
+
+The metrics sections report in-process counters of one subsystem each, so operators can size
+pools and caches from measurements. Counters are per worker process and reset on restart.
+The reload endpoint re-reads configuration without restarting the worker.
+"""
+
+from builtins import dict
+from fastapi import APIRouter, Depends
+from app.container import container
+from app.database import Database
+from app.dependencies import require_role
+from app.middleware import rate_limiter
+from app.services.jwt_service import token_cache
+from app.services.user_service import UserService
+
+router = APIRouter()
+
+
+@router.get("/metrics/", name="metrics", tags=["Operations Requires (Admin Role)"])
+async def get_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Return the worker's runtime metrics.
+
+    - **db_pool**: pool occupancy and connection checkout wait times.
+    - **token_cache**: verified access token cache size and hit/miss counters.
+    - **user_cache**: user entity cache hits per level, misses and hit ratio.
+    - **db_round_trips**: database round trips per request: statements, BEGINs, COMMITs and ROLLBACKs.
+    - **rate_limit**: requests allowed and rejected by the rate limiter, shared store failures, and the in-process store's buckets and evictions.
+    """
+    return {
+        "db_pool": Database.pool_stats(),
+        "db_round_trips": Database.round_trip_stats.as_dict(),
+        "rate_limit": rate_limiter.stats(),
+        "token_cache": token_cache.stats(),
+        "user_cache": UserService.user_cache_stats(),
+    }
+
+
+@router.post("/admin/reload-config/", name="reload_config", tags=["Operations Requires (Admin Role)"])
+async def reload_config(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Re-read `.env` and the environment and rebuild the application-scoped services
+    (email service, SMTP client, compiled templates) of this worker.
+    """
+    await container.reload()
+    return {"message": "Configuration reloaded"}
@@ -18,26 +18,51 @@ Key Highlights:
 - Utilizes OAuth2PasswordBearer for securing API endpoints, requiring valid access tokens for operations.
 """
 
-from builtins import dict, int, len, str
-from datetime import timedelta
+from builtins import ValueError, any, bool, dict, int, len, list, str
+from datetime import datetime, timedelta
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_current_user, get_db, get_email_service, require_role
-from app.schemas.pagination_schema import EnhancedPagination
-from app.schemas.token_schema import TokenResponse
-from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
-from app.services.user_service import UserService
-from app.services.jwt_service import create_access_token
-from app.utils.link_generation import create_user_links, generate_pagination_links
+from sqlalchemy.orm import sessionmaker
+from app.dependencies import get_current_user, get_db, get_email_service, get_read_db, get_read_session_factory, pin_reads_to_primary, require_role
+from app.schemas.link_schema import LinkMode
+from app.schemas.pagination_schema import CountMode, EnhancedPagination
+from app.models.user_model import UserRole
+from app.schemas.token_schema import RefreshTokenRequest, TokenResponse
+from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserImportReport, UserListResponse, UserResponse, UserUpdate
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.user_import_service import UserImportService
+from app.services.user_service import EXPORT_COLUMNS, DuplicateUserError, LoginStatus, UserService, UserVersionMismatchError
+from app.services.jwt_service import create_access_token, revoke_token
+from app.utils.link_generation import create_user_links, generate_cursor_pagination_links, generate_pagination_links
+from app.utils.etag import CACHE_CONTROL, list_etag, match, none_match, user_etag
+from app.utils.export_format import csv_chunk, csv_header, ndjson_chunk
+from app.utils.import_stream import iter_csv_rows, iter_ndjson_rows
+from app.utils.json_response import ModelResponse
+from app.utils.pagination_cursor import decode_cursor, encode_cursor
 from app.dependencies import get_settings
 from app.services.email_service import EmailService
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 settings = get_settings()
+USER_RESPONSE_FIELDS = tuple(name for name in UserResponse.model_fields if name != "links")
+
+def _user_response(user, request: Request, links: LinkMode) -> UserResponse:
+    """Build the response model straight from a database row, which is trusted and not re-validated."""
+    return UserResponse.model_construct(
+        **{name: getattr(user, name) for name in USER_RESPONSE_FIELDS},
+        links=create_user_links(user.id, request, links),
+    )
+
+def _user_etag(user, request: Request, links: LinkMode) -> str:
+    """The user's tag for the representation this request gets: its links depend on the mode and base URL."""
+    return user_etag(user.id, user.updated_at, links.value, request.base_url)
+
 @router.get("/users/{user_id}", response_model=UserResponse, name="get_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def get_user(user_id: UUID, request: Request, links: LinkMode = LinkMode.FULL, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_read_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Endpoint to fetch a user by their unique identifier (UUID).
 
@@ -47,29 +72,22 @@ async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(g
     Args:
         user_id: UUID of the user to fetch.
         request: The request object, used to generate full URLs in the response.
-        db: Dependency that provides an AsyncSession for database access.
+        links: Which HATEOAS links to include: `full`, `minimal` (only `self`) or `none`.
+        db: Dependency that provides an AsyncSession for database access, served by a read replica when available.
         token: The OAuth2 access token obtained through OAuth2PasswordBearer dependency.
+
+    Responses carry an `ETag`; a request whose `If-None-Match` lists the current tag gets
+    `304 Not Modified` with no body.
     """
     user = await UserService.get_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    return UserResponse.model_construct(
-        id=user.id,
-        nickname=user.nickname,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        bio=user.bio,
-        profile_picture_url=user.profile_picture_url,
-        github_profile_url=user.github_profile_url,
-        linkedin_profile_url=user.linkedin_profile_url,
-        role=user.role,
-        email=user.email,
-        last_login_at=user.last_login_at,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        links=create_user_links(user.id, request)  
-    )
+    etag = _user_etag(user, request, links)
+    if none_match(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    return ModelResponse(_user_response(user, request, links), headers=headers)
 
 # Additional endpoints for update, delete, create, and list users follow a similar pattern, using
 # asynchronous database operations, handling security with OAuth2PasswordBearer, and enhancing response
@@ -79,33 +97,39 @@ async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(g
 # experience by adhering to REST principles and providing self-discoverable operations.
 
 @router.put("/users/{user_id}", response_model=UserResponse, name="update_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def update_user(user_id: UUID, user_update: UserUpdate, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def update_user(user_id: UUID, user_update: UserUpdate, request: Request, links: LinkMode = LinkMode.FULL, if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Update user information.
 
     - **user_id**: UUID of the user to update.
     - **user_update**: UserUpdate model with updated user information.
+    - **links**: Which HATEOAS links to include: `full`, `minimal` (only `self`) or `none`.
+
+    With `If-Match`, the update only applies if the user still has one of the listed ETags;
+    otherwise it fails with `412 Precondition Failed` and nothing is changed.
     """
     user_data = user_update.model_dump(exclude_unset=True)
-    updated_user = await UserService.update(db, user_id, user_data)
+    expected_updated_at = None
+    if if_match:
+        current = await UserService.get_by_id(db, user_id)
+        if not current:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        # The client may have fetched the user with any links mode
+        if not any(match(if_match, _user_etag(current, request, mode)) for mode in LinkMode):
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="User was modified; fetch it again")
+        # Re-checked in the UPDATE itself, so a concurrent change in between is caught too
+        expected_updated_at = current.updated_at
+    try:
+        updated_user = await UserService.update(db, user_id, user_data, expected_updated_at)
+    except UserVersionMismatchError:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="User was modified; fetch it again")
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    return UserResponse.model_construct(
-        id=updated_user.id,
-        bio=updated_user.bio,
-        first_name=updated_user.first_name,
-        last_name=updated_user.last_name,
-        nickname=updated_user.nickname,
-        email=updated_user.email,
-        last_login_at=updated_user.last_login_at,
-        profile_picture_url=updated_user.profile_picture_url,
-        github_profile_url=updated_user.github_profile_url,
-        linkedin_profile_url=updated_user.linkedin_profile_url,
-        created_at=updated_user.created_at,
-        updated_at=updated_user.updated_at,
-        links=create_user_links(updated_user.id, request)
-    )
+    headers = {"ETag": _user_etag(updated_user, request, links)}
+    return ModelResponse(_user_response(updated_user, request, links), headers=headers)
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, name="delete_user", tags=["User Management Requires (Admin or Manager Roles)"])
@@ -123,7 +147,7 @@ async def delete_user(user_id: UUID, db: AsyncSession = Depends(get_db), token:
 
 
 @router.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["User Management Requires (Admin or Manager Roles)"], name="create_user")
-async def create_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def create_user(user: UserCreate, request: Request, links: LinkMode = LinkMode.FULL, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Create a new user.
 
@@ -131,105 +155,228 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     already exists, it returns a 400 error. On successful creation, it returns the
     newly created user's information along with links to related actions.
 
+    Duplicates are detected by the insert itself, so creation is a single write that is
+    also correct when the same email is registered concurrently.
+
     Parameters:
     - user (UserCreate): The user information to create.
     - request (Request): The request object.
+    - links (LinkMode): Which HATEOAS links to include: `full`, `minimal` (only `self`) or `none`.
     - db (AsyncSession): The database session.
 
     Returns:
     - UserResponse: The newly created user's information along with navigation links.
     """
-    existing_user = await UserService.get_by_email(db, user.email)
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-    
-    created_user = await UserService.create(db, user.model_dump(), email_service)
+    try:
+        created_user = await UserService.create(db, user.model_dump(), email_service)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not created_user:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
     
     
-    return UserResponse.model_construct(
-        id=created_user.id,
-        bio=created_user.bio,
-        first_name=created_user.first_name,
-        last_name=created_user.last_name,
-        profile_picture_url=created_user.profile_picture_url,
-        nickname=created_user.nickname,
-        email=created_user.email,
-        last_login_at=created_user.last_login_at,
-        created_at=created_user.created_at,
-        updated_at=created_user.updated_at,
-        links=create_user_links(created_user.id, request)
+    return ModelResponse(_user_response(created_user, request, links), status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/users/import/", response_model=UserImportReport, name="import_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def import_users(request: Request, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Create many users from an uploaded file, streamed and imported in batches.
+
+    Send the file as the request body with `Content-Type: application/x-ndjson` (one JSON
+    user object per line) or `text/csv` (a header row naming the `UserCreate` fields). Each
+    row is validated like `POST /users/`. Rows that fail are listed in the report with their
+    row number; the other rows are created and sent a verification email.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        rows = iter_csv_rows(request.stream())
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        rows = iter_ndjson_rows(request.stream())
+    else:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Send the file as application/x-ndjson or text/csv")
+    return await UserImportService.import_users(db, rows, email_service)
+
+
+@router.get("/users/export/", name="export_users", tags=["User Management Requires (Admin or Manager Roles)"])
+async def export_users(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    columns: Optional[str] = None,
+    role: Optional[UserRole] = None,
+    email_verified: Optional[bool] = None,
+    is_locked: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    session_factory: sessionmaker = Depends(get_read_session_factory),
+    current_user: dict = Depends(require_role(["ADMIN"])),
+):
+    """
+    Stream users as NDJSON or CSV, in creation order.
+
+    - **format**: `ndjson` (default) or `csv`.
+    - **columns**: comma-separated columns to include; all exportable columns by default.
+    - **role**, **email_verified**, **is_locked**, **created_after**, **created_before**: filters.
+
+    Rows are read from a server-side cursor and written as the client consumes them, so
+    exporting the whole table runs in constant memory.
+    """
+    selected = [name.strip() for name in columns.split(",") if name.strip()] if columns else list(EXPORT_COLUMNS)
+    unknown = [name for name in selected if name not in EXPORT_COLUMNS]
+    if unknown or not selected:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown export columns: {', '.join(unknown)}; choose from {', '.join(EXPORT_COLUMNS)}")
+    batches = UserService.export_users(
+        session_factory, selected, role=role, email_verified=email_verified, is_locked=is_locked,
+        created_after=created_after, created_before=created_before,
     )
 
+    async def body():
+        if format == "csv":
+            yield csv_header(selected)
+        async for rows in batches:
+            yield csv_chunk(rows, selected) if format == "csv" else ndjson_chunk(rows, selected)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="users.{format}"'}
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
 
 @router.get("/users/", response_model=UserListResponse, tags=["User Management Requires (Admin or Manager Roles)"])
 async def list_users(
     request: Request,
-    skip: int = 0,
+    skip: Optional[int] = None,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    links: LinkMode = LinkMode.FULL,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users = await UserService.count(db)
-    users = await UserService.list_users(db, skip, limit)
+    """
+    List users ordered by creation time.
+
+    Pages are fetched by keyset (cursor) pagination: follow the opaque `cursor` values in the
+    `next`/`prev` links. Passing `skip` without a `cursor` selects the legacy offset pagination.
+
+    `count` selects how `total` is computed: `exact`, `cached` (exact, but reused for a short
+    time) or `estimated` (from table statistics, flagged by `total_estimated`).
+
+    `links` selects the hypermedia in the page: `full` (every action on each user plus all
+    paging links), `minimal` (each user's `self` plus `self`/`next`/`prev`) or `none`, for
+    bulk consumers that do not follow links.
+
+    Pages carry an `ETag` covering their items and total; `If-None-Match` with the current
+    tag returns `304 Not Modified`.
+    """
+    count_mode = count or settings.user_count_default_mode
+    if skip is not None and cursor is None:
+        user_page = await UserService.list_users_page(db, limit, skip=skip, count_mode=count_mode)
+        pagination_links = generate_pagination_links(request, skip, limit, user_page.total, links)
+        page = skip // limit + 1
+    else:
+        try:
+            page_cursor = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        user_page = await UserService.list_users_page(db, limit, cursor=page_cursor, count_mode=count_mode)
+        pagination_links = generate_cursor_pagination_links(
+            request, limit, cursor,
+            encode_cursor(user_page.next_cursor) if user_page.next_cursor else None,
+            encode_cursor(user_page.prev_cursor) if user_page.prev_cursor else None,
+            links,
+        )
+        page = None
+
+    etag = list_etag(
+        ((user.id, user.updated_at) for user in user_page.items),
+        user_page.total, user_page.total_estimated, request.url.query,
+    )
+    if none_match(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    user_responses = [_user_response(user, request, links) for user in user_page.items]
 
-    user_responses = [
-        UserResponse.model_validate(user) for user in users
-    ]
-    
-    pagination_links = generate_pagination_links(request, skip, limit, total_users)
-    
     # Construct the final response with pagination details
-    return UserListResponse(
+    return ModelResponse(UserListResponse.model_construct(
         items=user_responses,
-        total=total_users,
-        page=skip // limit + 1,
+        total=user_page.total,
+        total_estimated=user_page.total_estimated,
+        page=page,
         size=len(user_responses),
-        links=pagination_links  # Ensure you have appropriate logic to create these links
-    )
+        links=pagination_links
+    ), headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @router.post("/register/", response_model=UserResponse, tags=["Login and Registration"])
 async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
-    user = await UserService.register_user(session, user_data.model_dump(), email_service)
+    try:
+        user = await UserService.register_user(session, user_data.model_dump(), email_service)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if user:
         return user
-    raise HTTPException(status_code=400, detail="Email already exists")
+    raise HTTPException(status_code=400, detail="Invalid registration data")
 
-@router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
-        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-
-    user = await UserService.login_user(session, form_data.username, form_data.password)
-    if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+def _token_response(email: str, role: UserRole, refresh_token: str) -> dict:
+    access_token = create_access_token(
+        data={"sub": email, "role": str(role.name)},
+        expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
-        access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
-        )
+async def _login(form_data: OAuth2PasswordRequestForm, session: AsyncSession) -> dict:
+    """
+    One lookup and one conditional UPDATE per attempt; on success the refresh token is
+    inserted in the same transaction and everything is committed at once.
+    """
+    result = await UserService.authenticate(session, form_data.username, form_data.password)
+    if result.status == LoginStatus.LOCKED:
+        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
+    if result.status != LoginStatus.SUCCESS:
+        raise HTTPException(status_code=401, detail="Incorrect email or password.")
+    refresh_token = RefreshTokenService.issue(session, result.user_id)
+    await session.commit()
+    await UserService.invalidate_user_cache(result.user_id)
+    # The request had no token to pin by; the client's next reads carry one for this subject
+    pin_reads_to_primary(result.email)
+    return _token_response(result.email, result.role, refresh_token)
 
-        return {"access_token": access_token, "token_type": "bearer"}
-    raise HTTPException(status_code=401, detail="Incorrect email or password.")
+@router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
+    return await _login(form_data, session)
 
 @router.post("/login/", include_in_schema=False, response_model=TokenResponse, tags=["Login and Registration"])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
-        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
+    return await _login(form_data, session)
 
-    user = await UserService.login_user(session, form_data.username, form_data.password)
-    if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+@router.post("/refresh/", response_model=TokenResponse, tags=["Login and Registration"])
+async def refresh(token_request: RefreshTokenRequest, session: AsyncSession = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token, without
+    re-entering the password.
 
-        access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
-        )
+    Each refresh token can be used once. Presenting a used token again revokes every token
+    descended from the same login, and the client has to log in again.
+    """
+    grant = await RefreshTokenService.rotate(session, token_request.refresh_token)
+    if grant is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token.")
+    return _token_response(grant.email, grant.role, grant.refresh_token)
+
+@router.post("/logout/", status_code=status.HTTP_204_NO_CONTENT, name="logout", tags=["Login and Registration"])
+async def logout(token_request: Optional[RefreshTokenRequest] = None, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(get_current_user)):
+    """
+    End a session: the access token is rejected from now on, and when the refresh token is
+    sent too, its whole family is revoked so the session cannot be refreshed.
+
+    Access tokens are stateless, so their revocation is held by the worker serving this
+    request; on other workers the token lives until it expires, which is at most
+    `access_token_expire_minutes` since it can no longer be refreshed.
+    """
+    revoke_token(token)
+    if token_request is not None:
+        await RefreshTokenService.revoke(session, token_request.refresh_token, current_user["user_id"])
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-        return {"access_token": access_token, "token_type": "bearer"}
-    raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
 
 @router.get("/verify-email/{user_id}/{token}", status_code=status.HTTP_200_OK, name="verify_email", tags=["Login and Registration"])
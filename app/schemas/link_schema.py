@@ -1,5 +1,12 @@
+from enum import Enum
 from pydantic import BaseModel, Field, HttpUrl
 
+class LinkMode(str, Enum):
+    """How much hypermedia a response carries: no links, only `self`/paging, or all links."""
+    NONE = "none"
+    MINIMAL = "minimal"
+    FULL = "full"
+
 class Link(BaseModel):
     rel: str = Field(..., description="Relation type of the link.")
     href: HttpUrl = Field(..., description="The URL of the link.")
@@ -1,5 +1,6 @@
 import re
 from datetime import datetime
+from enum import Enum
 from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field, HttpUrl, validator, conint
@@ -23,6 +24,12 @@ class Pagination(BaseModel):
 
 
 
+class CountMode(str, Enum):
+    """How the total item count of a listing is computed."""
+    EXACT = "exact"          # SELECT count(*) on every request
+    CACHED = "cached"        # exact count, reused for a short TTL and dropped on writes
+    ESTIMATED = "estimated"  # planner row estimate from the table statistics
+
 class PaginationLink(BaseModel):
     rel: str
     href: HttpUrl
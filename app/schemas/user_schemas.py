@@ -6,6 +6,8 @@ from enum import Enum
 import uuid
 import re
 
+from app.schemas.link_schema import Link
+from app.schemas.pagination_schema import PaginationLink
 from app.utils.nickname_gen import generate_nickname
 
 class UserRole(str, Enum):
@@ -64,6 +66,7 @@ class UserResponse(UserBase):
     nickname: Optional[str] = Field(None, min_length=3, pattern=r'^[\w-]+$', example=generate_nickname())    
     role: UserRole = Field(default=UserRole.AUTHENTICATED, example="AUTHENTICATED")
     is_professional: Optional[bool] = Field(default=False, example=True)
+    links: List[Link] = Field(default_factory=list, description="Actions on this user; see the `links` query option.")
 
 class LoginRequest(BaseModel):
     email: str = Field(..., example="john.doe@example.com")
@@ -83,5 +86,17 @@ class UserListResponse(BaseModel):
         "github_profile_url": "https://github.com/johndoe"
     }])
     total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
+    total_estimated: bool = Field(False, example=False, description="True when total is a planner estimate rather than an exact count.")
+    page: Optional[int] = Field(None, example=1, description="Page number; not set for cursor pagination.")
     size: int = Field(..., example=10)
+    links: List[PaginationLink] = Field(default_factory=list)
+
+class UserImportError(BaseModel):
+    row: int = Field(..., example=3)
+    error: str = Field(..., example="Email already exists")
+
+class UserImportReport(BaseModel):
+    created: int = Field(0, example=998)
+    failed: int = Field(0, example=2)
+    errors: List[UserImportError] = Field(default_factory=list)
+    errors_truncated: bool = Field(False, description="True when more rows failed than are listed in errors")
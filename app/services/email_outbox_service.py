@@ -0,0 +1,180 @@
+# email_outbox_service.py
+from builtins import Exception, bool, classmethod, dict, float, int, isinstance, len, min, str, zip
+import asyncio
+import logging
+import random
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.email_outbox_model import EmailOutbox, EmailOutboxStatus
+from app.services.email_service import EmailService
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+class EmailOutboxService:
+    @classmethod
+    def enqueue(cls, session: AsyncSession, email_type: str, recipient: str, context: dict) -> EmailOutbox:
+        """
+        Add an email to the outbox in the caller's transaction. Nothing is sent until the
+        transaction commits and a worker claims the row.
+        """
+        email = EmailOutbox(email_type=email_type, recipient=recipient, context=context)
+        session.add(email)
+        return email
+
+    @classmethod
+    async def enqueue_many(cls, session: AsyncSession, email_type: str, messages: List[Tuple[str, dict]]):
+        """Add many `(recipient, context)` emails to the outbox with one multi-row INSERT."""
+        if messages:
+            await session.execute(
+                insert(EmailOutbox),
+                [{"email_type": email_type, "recipient": recipient, "context": context} for recipient, context in messages],
+            )
+
+    @classmethod
+    async def claim_batch(cls, session: AsyncSession, batch_size: int, lease_seconds: float) -> List[EmailOutbox]:
+        """
+        Claim up to `batch_size` due emails in one statement.
+
+        Rows locked by another worker are skipped, and claimed rows have their
+        `next_attempt_at` pushed out by the lease, so a crashed worker's emails become due
+        again once the lease expires.
+        """
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == EmailOutboxStatus.PENDING, EmailOutbox.next_attempt_at <= func.now())
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        query = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(due.scalar_subquery()))
+            .values(
+                attempts=EmailOutbox.attempts + 1,
+                next_attempt_at=func.now() + timedelta(seconds=lease_seconds),
+            )
+            .returning(EmailOutbox)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(query)
+        emails = result.scalars().all()
+        await session.commit()
+        return emails
+
+    @classmethod
+    async def mark_sent(cls, session: AsyncSession, email: EmailOutbox):
+        query = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id == email.id)
+            .values(status=EmailOutboxStatus.SENT, sent_at=func.now(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(query)
+
+    @classmethod
+    async def mark_failed(cls, session: AsyncSession, email: EmailOutbox, error: str, max_attempts: int, backoff_seconds: float, max_backoff_seconds: float) -> bool:
+        """
+        Schedule a retry with exponential backoff and jitter, or dead-letter the email once
+        it has used all its attempts. Returns True when the email was dead-lettered.
+        """
+        values = {"last_error": error[:2000]}
+        dead = email.attempts >= max_attempts
+        if dead:
+            values["status"] = EmailOutboxStatus.DEAD
+        else:
+            delay = min(backoff_seconds * 2 ** (email.attempts - 1), max_backoff_seconds)
+            values["next_attempt_at"] = func.now() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+        query = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id == email.id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(query)
+        return dead
+
+
+class EmailOutboxWorker:
+    """
+    Background task that drains the email outbox: it claims batches of due emails,
+    renders and sends them, and records the outcome of each delivery.
+
+    The email service is resolved through `email_service_provider` for every batch, and
+    options not given explicitly are read from the settings for every batch, so a
+    configuration reload reaches a running worker.
+    """
+
+    def __init__(self, session_factory, email_service_provider: Callable[[], EmailService],
+                 batch_size: Optional[int] = None,
+                 poll_seconds: Optional[float] = None,
+                 max_attempts: Optional[int] = None,
+                 backoff_seconds: Optional[float] = None,
+                 max_backoff_seconds: Optional[float] = None,
+                 lease_seconds: Optional[float] = None):
+        self.session_factory = session_factory
+        self.email_service_provider = email_service_provider
+        self._options = dict(
+            batch_size=batch_size,
+            poll_seconds=poll_seconds,
+            max_attempts=max_attempts,
+            backoff_seconds=backoff_seconds,
+            max_backoff_seconds=max_backoff_seconds,
+            lease_seconds=lease_seconds,
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def _option(self, name: str):
+        value = self._options[name]
+        return getattr(settings, f"email_outbox_{name}") if value is None else value
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run(), name="email-outbox-worker")
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+                processed = 0
+            if processed < self._option("batch_size"):
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self._option("poll_seconds"))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def process_batch(self) -> int:
+        """Claim, send and settle one batch of emails. Returns the number of emails claimed."""
+        email_service = self.email_service_provider()
+        async with self.session_factory() as session:
+            emails = await EmailOutboxService.claim_batch(session, self._option("batch_size"), self._option("lease_seconds"))
+            if not emails:
+                return 0
+            results = await asyncio.gather(
+                *(email_service.send_user_email(email.context, email.email_type) for email in emails),
+                return_exceptions=True,
+            )
+            for email, result in zip(emails, results):
+                if isinstance(result, Exception):
+                    dead = await EmailOutboxService.mark_failed(
+                        session, email, str(result), self._option("max_attempts"),
+                        self._option("backoff_seconds"), self._option("max_backoff_seconds"),
+                    )
+                    if dead:
+                        logger.error(f"Email {email.id} to {email.recipient} dead-lettered after {email.attempts} attempts: {result}")
+                else:
+                    await EmailOutboxService.mark_sent(session, email)
+            await session.commit()
+            return len(emails)
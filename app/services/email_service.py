@@ -1,18 +1,28 @@
 # email_service.py
 from builtins import ValueError, dict, str
+from typing import Optional
 from settings.config import settings
 from app.utils.smtp_connection import SMTPClient
 from app.utils.template_manager import TemplateManager
 from app.models.user_model import User
 
+def create_smtp_client() -> SMTPClient:
+    return SMTPClient(
+        server=settings.smtp_server,
+        port=settings.smtp_port,
+        username=settings.smtp_username,
+        password=settings.smtp_password,
+        use_tls=settings.smtp_use_tls,
+        pool_size=settings.smtp_pool_size,
+        idle_timeout=settings.smtp_idle_timeout_seconds,
+        max_messages_per_connection=settings.smtp_max_messages_per_connection,
+        timeout=settings.smtp_timeout_seconds
+    )
+
 class EmailService:
-    def __init__(self, template_manager: TemplateManager):
-        self.smtp_client = SMTPClient(
-            server=settings.smtp_server,
-            port=settings.smtp_port,
-            username=settings.smtp_username,
-            password=settings.smtp_password
-        )
+    def __init__(self, template_manager: TemplateManager, smtp_client: Optional[SMTPClient] = None):
+        # Pass a shared client so its pooled SMTP sessions are reused across services.
+        self.smtp_client = smtp_client or create_smtp_client()
         self.template_manager = template_manager
 
     async def send_user_email(self, user_data: dict, email_type: str):
@@ -26,12 +36,16 @@ class EmailService:
             raise ValueError("Invalid email type")
 
         html_content = self.template_manager.render_template(email_type, **user_data)
-        self.smtp_client.send_email(subject_map[email_type], html_content, user_data['email'])
+        await self.smtp_client.send_email(subject_map[email_type], html_content, user_data['email'])
 
-    async def send_verification_email(self, user: User):
+    @staticmethod
+    def verification_email_context(user: User) -> dict:
         verification_url = f"{settings.server_base_url}verify-email/{user.id}/{user.verification_token}"
-        await self.send_user_email({
+        return {
             "name": user.first_name,
             "verification_url": verification_url,
             "email": user.email
-        }, 'email_verification')
\ No newline at end of file
+        }
+
+    async def send_verification_email(self, user: User):
+        await self.send_user_email(self.verification_email_context(user), 'email_verification')
\ No newline at end of file
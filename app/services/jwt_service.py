@@ -1,9 +1,53 @@
 # app/services/jwt_service.py
-from builtins import dict, str
+from builtins import RuntimeError, dict, float, int, isinstance, len, str
+import hashlib
+import logging
+import threading
+import time
 import jwt
 from datetime import datetime, timedelta
+from typing import Optional
+from app.utils.jwt_keys import ASYMMETRIC_ALGORITHMS, KeySet
+from app.utils.ttl_cache import TTLCache
 from settings.config import settings
 
+_keyset: Optional[KeySet] = None
+_keyset_lock = threading.Lock()
+
+def signing_algorithm() -> str:
+    """The configured `jwt_algorithm`, or EdDSA when signing keys are configured and HS256 otherwise."""
+    return settings.jwt_algorithm or ("EdDSA" if settings.jwt_keys_dir else "HS256")
+
+def _load_keyset() -> KeySet:
+    grace_seconds = settings.jwt_key_grace_minutes * 60
+    if settings.jwt_keys_dir:
+        return KeySet.from_directory(settings.jwt_keys_dir, grace_seconds, settings.jwt_key_publish_minutes * 60)
+    if not settings.debug:
+        # Every worker would sign with a key of its own, and restarts would invalidate all tokens
+        raise RuntimeError(f"jwt_keys_dir must be set to sign tokens with {signing_algorithm()}")
+    logging.warning("jwt_keys_dir is not set; signing tokens with a key generated for this process only")
+    return KeySet.generate(signing_algorithm(), grace_seconds)
+
+def get_keyset() -> KeySet:
+    """The asymmetric signing keys, loaded from `jwt_keys_dir` on first use."""
+    global _keyset
+    if _keyset is None:
+        with _keyset_lock:
+            if _keyset is None:
+                _keyset = _load_keyset()
+    return _keyset
+
+def reload_keyset():
+    """
+    Re-read `jwt_keys_dir` to pick up added or removed keys; a generated key is kept.
+    Verified tokens are forgotten, so tokens signed by a removed key stop verifying at once.
+    """
+    global _keyset
+    if signing_algorithm() in ASYMMETRIC_ALGORITHMS and (settings.jwt_keys_dir or _keyset is None):
+        with _keyset_lock:
+            _keyset = _load_keyset()
+        token_cache.forget_verified()
+
 def create_access_token(*, data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     # Convert role to uppercase before encoding the JWT
@@ -11,12 +55,122 @@ def create_access_token(*, data: dict, expires_delta: timedelta = None):
         to_encode['role'] = to_encode['role'].upper()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
-    return encoded_jwt
+    algorithm = signing_algorithm()
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=algorithm)
+    key = get_keyset().signing_key()
+    return jwt.encode(to_encode, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
 
 def decode_token(token: str):
     try:
-        decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        return decoded
+        algorithm = signing_algorithm()
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            return jwt.decode(token, settings.jwt_secret_key, algorithms=[algorithm])
+        # The kid picks the key; the algorithm comes from that key, never from the token header
+        key = get_keyset().verification_key(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return None
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
     except jwt.PyJWTError:
         return None
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens whose signature and claims have already been verified.
+
+    Entries are keyed by a SHA-256 digest of the token, so raw bearer tokens are never held,
+    and each entry expires at the token's own `exp`. Revoked tokens are remembered until
+    they expire so they cannot be verified again; like the cache itself, revocations are
+    held per worker. Dependencies such as `get_current_user`
+    run in FastAPI's threadpool, so every access is guarded by a lock.
+    """
+
+    def __init__(self, maxsize: int):
+        self._verified = TTLCache(ttl_seconds=0, maxsize=maxsize)
+        self._revoked = TTLCache(ttl_seconds=0, maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _seconds_left(payload: dict) -> float:
+        exp = payload.get("exp")
+        return exp - time.time() if isinstance(exp, (int, float)) else 0
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._digest(token)
+        with self._lock:
+            payload = self._verified.get(key)
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict):
+        ttl = self._seconds_left(payload)
+        if ttl <= 0:
+            return
+        key = self._digest(token)
+        with self._lock:
+            if self._revoked.get(key) is None:
+                self._verified.set(key, payload, ttl_seconds=ttl)
+
+    def is_revoked(self, token: str) -> bool:
+        with self._lock:
+            return self._revoked.get(self._digest(token)) is not None
+
+    def revoke(self, token: str, payload: Optional[dict] = None):
+        """Reject the token from now on; `payload` supplies its expiry if it is already decoded."""
+        payload = payload or decode_token(token)
+        ttl = self._seconds_left(payload) if payload else 0
+        key = self._digest(token)
+        with self._lock:
+            self._verified.invalidate(key)
+            if ttl > 0:
+                self._revoked.set(key, True, ttl_seconds=ttl)
+
+    def forget_verified(self):
+        """Drop every verified token, keeping the revoked ones; each is verified again on next use."""
+        with self._lock:
+            self._verified.clear()
+
+    def clear(self):
+        with self._lock:
+            self._verified.clear()
+            self._revoked.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._verified),
+                "revoked": len(self._revoked),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+token_cache = VerifiedTokenCache(maxsize=settings.token_cache_size)
+
+def verify_token(token: str) -> Optional[dict]:
+    """Decode a token, reusing the result of an earlier verification of the same token."""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    if token_cache.is_revoked(token):
+        return None
+    payload = decode_token(token)
+    if payload is not None:
+        token_cache.put(token, payload)
+    return payload
+
+def revoke_token(token: str):
+    """Reject an access token in this worker until it expires, see `VerifiedTokenCache`."""
+    token_cache.revoke(token)
@@ -0,0 +1,182 @@
+# refresh_token_service.py
+from builtins import Exception, bytes, classmethod, float, int, str
+import asyncio
+import hashlib
+import logging
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User, UserRole
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+class RefreshGrant(NamedTuple):
+    """The owner of a consumed refresh token and the successor issued in its place."""
+    refresh_token: str
+    email: str
+    role: UserRole
+
+class RefreshTokenService:
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    @classmethod
+    def issue(cls, session: AsyncSession, user_id: uuid.UUID, family_id: Optional[uuid.UUID] = None) -> str:
+        """
+        Add a new refresh token to the caller's transaction and return the opaque token.
+        Only its digest is stored, so a database leak does not expose usable tokens.
+        """
+        token = secrets.token_urlsafe(32)
+        session.add(RefreshToken(
+            token_hash=cls._digest(token),
+            family_id=family_id or uuid.uuid4(),
+            user_id=user_id,
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=settings.refresh_token_expire_minutes),
+        ))
+        return token
+
+    @classmethod
+    async def rotate(cls, session: AsyncSession, token: str) -> Optional[RefreshGrant]:
+        """
+        Exchange a refresh token for a successor in the same family.
+
+        The token is consumed by a single conditional UPDATE that also reads its owner, so two
+        concurrent refreshes with the same token cannot both succeed and no user row is loaded.
+        A token that exists but was already consumed or revoked is being replayed: the whole
+        family is revoked, logging out both the attacker and the legitimate client.
+        """
+        token_hash = cls._digest(token)
+        tokens, users = RefreshToken.__table__, User.__table__
+        # Core UPDATE ... FROM users: the ORM cannot return columns of the joined table
+        query = (
+            update(tokens)
+            .where(
+                tokens.c.token_hash == token_hash,
+                tokens.c.used_at.is_(None),
+                tokens.c.revoked_at.is_(None),
+                tokens.c.expires_at > func.now(),
+                users.c.id == tokens.c.user_id,
+                users.c.is_locked.is_(False),
+            )
+            .values(used_at=func.now())
+            .returning(tokens.c.family_id, tokens.c.user_id, users.c.email, users.c.role)
+        )
+        row = (await session.execute(query)).first()
+        if row is None:
+            family_id = await session.scalar(
+                select(RefreshToken.family_id).where(
+                    RefreshToken.token_hash == token_hash,
+                    (RefreshToken.used_at.is_not(None)) | (RefreshToken.revoked_at.is_not(None)),
+                )
+            )
+            if family_id is not None:
+                logger.warning(f"Refresh token reuse detected; revoking token family {family_id}")
+                await cls.revoke_family(session, family_id)
+            await session.commit()
+            return None
+        successor = cls.issue(session, row.user_id, row.family_id)
+        await session.commit()
+        return RefreshGrant(refresh_token=successor, email=row.email, role=row.role)
+
+    @classmethod
+    async def revoke_family(cls, session: AsyncSession, family_id: uuid.UUID):
+        query = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(query)
+
+    @classmethod
+    async def revoke(cls, session: AsyncSession, token: str, email: str):
+        """
+        Revoke the family of `token` in the caller's transaction, so neither it nor any token
+        rotated from the same login can be refreshed again. Tokens of other users are ignored.
+        """
+        family = (
+            select(RefreshToken.family_id)
+            .join(User, User.id == RefreshToken.user_id)
+            .where(RefreshToken.token_hash == cls._digest(token), User.email == email)
+            .scalar_subquery()
+        )
+        query = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(query)
+
+    @classmethod
+    async def purge(cls, session: AsyncSession, retention: timedelta, batch_size: int) -> int:
+        """
+        Delete tokens that expired or were revoked more than `retention` ago, in batches of
+        `batch_size` rows each committed on its own. Consumed tokens are kept until then, as
+        replaying one is how reuse is detected. Returns the number of rows deleted.
+        """
+        cutoff = datetime.now(timezone.utc) - retention
+        stale = (
+            select(RefreshToken.token_hash)
+            .where((RefreshToken.expires_at < cutoff) | (RefreshToken.revoked_at < cutoff))
+            .limit(batch_size)
+        )
+        deleted = 0
+        while True:
+            result = await session.execute(
+                delete(RefreshToken)
+                .where(RefreshToken.token_hash.in_(stale.scalar_subquery()))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+
+
+class RefreshTokenPurgeWorker:
+    """Background task that runs `RefreshTokenService.purge` every `refresh_token_purge_interval_seconds`."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run(), name="refresh-token-purge")
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self.purge()
+            except Exception as e:
+                logger.error(f"Refresh token purge error: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.refresh_token_purge_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def purge(self) -> int:
+        async with self.session_factory() as session:
+            deleted = await RefreshTokenService.purge(
+                session,
+                timedelta(minutes=settings.refresh_token_retention_minutes),
+                settings.refresh_token_purge_batch_size,
+            )
+        if deleted:
+            logger.info(f"Purged {deleted} stale refresh tokens")
+        return deleted
@@ -0,0 +1,139 @@
+# user_import_service.py
+from builtins import BaseException, classmethod, dict, isinstance, len, list, set, str, zip
+import asyncio
+import logging
+import uuid
+from typing import AsyncIterator, List
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User, UserRole
+from app.schemas.user_schemas import UserCreate, UserImportError, UserImportReport
+from app.services.email_outbox_service import EmailOutboxService
+from app.services.email_service import EmailService
+from app.services.user_service import UserService
+from app.utils.import_stream import ImportRow, batched
+from app.utils.security import PasswordHashingBusyError, generate_verification_token, hash_password_async
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors())
+
+class UserImportService:
+    @classmethod
+    def _add_error(cls, report: UserImportReport, row: int, error: str):
+        report.failed += 1
+        if len(report.errors) < settings.user_import_max_errors:
+            report.errors.append(UserImportError(row=row, error=error))
+        else:
+            report.errors_truncated = True
+
+    @classmethod
+    async def _hash_passwords(cls, passwords: List[str]) -> list:
+        """
+        Hash a batch of passwords on the hashing pool's threads, where bcrypt runs in
+        parallel across cores. At most `password_hash_workers` jobs are queued at once so an
+        import never fills the pool's queue and starves interactive logins.
+        """
+        semaphore = asyncio.Semaphore(settings.password_hash_workers)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                return await hash_password_async(password)
+
+        return await asyncio.gather(*(hash_one(password) for password in passwords), return_exceptions=True)
+
+    @classmethod
+    async def import_users(cls, session: AsyncSession, rows: AsyncIterator[ImportRow], email_service: EmailService) -> UserImportReport:
+        """
+        Create users from a stream of uploaded rows, one batch of `user_import_batch_size` rows
+        per transaction, and report every row that could not be imported.
+
+        Rows that already committed stay committed if a later batch fails.
+        """
+        report = UserImportReport()
+        async for batch in batched(rows, settings.user_import_batch_size):
+            await cls._import_batch(session, batch, email_service, report)
+        if report.created:
+            UserService.invalidate_count_cache()
+        return report
+
+    @classmethod
+    async def _import_batch(cls, session: AsyncSession, batch: List[ImportRow], email_service: EmailService, report: UserImportReport):
+        candidates = []
+        batch_emails = set()
+        for row in batch:
+            if row.error is not None:
+                cls._add_error(report, row.row, row.error)
+                continue
+            try:
+                data = UserCreate(**row.data).model_dump()
+            except ValidationError as e:
+                cls._add_error(report, row.row, _format_validation_error(e))
+                continue
+            if data["email"] in batch_emails:
+                cls._add_error(report, row.row, "Duplicate email in import")
+                continue
+            batch_emails.add(data["email"])
+            candidates.append((row.row, data))
+        if not candidates:
+            return
+
+        # Hash before touching the session, so no connection is held while bcrypt runs. Rows
+        # whose email turns out to exist are hashed for nothing; they are rare in an import
+        hashed = await cls._hash_passwords([data.pop("password") for _, data in candidates])
+        hashed_candidates = []
+        for (row_number, data), hashed_password in zip(candidates, hashed):
+            if isinstance(hashed_password, BaseException):
+                busy = isinstance(hashed_password, PasswordHashingBusyError)
+                cls._add_error(report, row_number, "Server busy, retry this row" if busy else "Password could not be hashed")
+                continue
+            data["hashed_password"] = hashed_password
+            hashed_candidates.append((row_number, data))
+        if not hashed_candidates:
+            return
+
+        # From here on the batch is one short transaction: two lookups, the INSERT and the commit.
+        # Earlier batches are committed, so this also catches duplicates across batches
+        emails = [data["email"] for _, data in hashed_candidates]
+        result = await session.execute(select(User.email).where(User.email.in_(emails)))
+        existing = set(result.scalars().all())
+        accepted = []
+        for row_number, data in hashed_candidates:
+            if data["email"] in existing:
+                cls._add_error(report, row_number, "Email already exists")
+            else:
+                accepted.append((row_number, data))
+        if not accepted:
+            await session.commit()
+            return
+
+        nicknames = await UserService.allocate_nicknames(session, len(accepted))
+        values = []
+        row_numbers = {}
+        for (row_number, data), nickname in zip(accepted, nicknames):
+            data.update(
+                id=uuid.uuid4(),
+                nickname=nickname,
+                verification_token=generate_verification_token(),
+                role=UserRole.ANONYMOUS,
+            )
+            values.append(data)
+            row_numbers[data["id"]] = row_number
+
+        # A concurrent registration may still take an email or nickname; those rows are skipped
+        query = insert(User).on_conflict_do_nothing().returning(User.id)
+        inserted = set((await session.execute(query, values)).scalars().all())
+        for data in values:
+            if data["id"] not in inserted:
+                cls._add_error(report, row_numbers[data["id"]], "Email or nickname already exists")
+        await EmailOutboxService.enqueue_many(session, 'email_verification', [
+            (data["email"], email_service.verification_email_context(User(**data)))
+            for data in values if data["id"] in inserted
+        ])
+        await session.commit()
+        report.created += len(inserted)
+        logger.info(f"Imported {len(inserted)} users; {report.failed} rows failed so far")
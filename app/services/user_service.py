@@ -1,31 +1,132 @@
-from builtins import Exception, bool, classmethod, int, str
-from datetime import datetime, timezone
+from builtins import Exception, any, bool, classmethod, dict, getattr, int, isinstance, issubclass, iter, len, list, max, next, range, set, str
+from datetime import datetime
+from enum import Enum
 import secrets
-from typing import Optional, Dict, List
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, NamedTuple, Optional, Dict, List, Sequence, Tuple
 from pydantic import ValidationError
-from sqlalchemy import func, null, update, select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import BigInteger, RowMapping, cast, column, func, null, or_, table, update, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from app.dependencies import get_email_service, get_settings
 from app.models.user_model import User
+from app.schemas.pagination_schema import CountMode
 from app.schemas.user_schemas import UserCreate, UserUpdate
-from app.utils.nickname_gen import generate_nickname
-from app.utils.security import generate_verification_token, hash_password, verify_password
+from app.utils.nickname_gen import generate_nickname, generate_nicknames
+from app.utils.pagination_cursor import NEXT, PREV, PageCursor
+from app.utils.entity_cache import EntityCache, create_cache_backend
+from app.utils.ttl_cache import TTLCache
+from app.utils.security import generate_verification_token, hash_password_async, verify_password_async
 from uuid import UUID
 from app.services.email_service import EmailService
+from app.services.email_outbox_service import EmailOutboxService
 from app.models.user_model import UserRole
 import logging
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Nickname candidates checked per query when allocating a nickname for a new user
+NICKNAME_CANDIDATES_PER_QUERY = 16
+
+# Inserts tried when the generated nickname collides with an existing one
+USER_CREATE_ATTEMPTS = 3
+
+# Single-column lookups answered by the user cache; the first is the primary key
+CACHED_USER_LOOKUPS = ("id", "email", "nickname")
+
+# Columns a user export may contain; password hashes and verification tokens never leave the database
+EXPORT_COLUMNS = (
+    "id", "nickname", "email", "first_name", "last_name", "bio", "profile_picture_url",
+    "linkedin_profile_url", "github_profile_url", "role", "is_professional", "email_verified",
+    "is_locked", "last_login_at", "created_at", "updated_at",
+)
+
+class DuplicateUserError(Exception):
+    """Raised when creating or updating a user would violate a unique constraint; `field` names it."""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field.capitalize()} already exists")
+        self.field = field
+
+def _duplicate_field(error: IntegrityError) -> Optional[str]:
+    """Name the unique user field a statement collided on, from the violated index; None for other violations."""
+    message = str(error.orig)
+    return next((field for field in ("email", "nickname") if f"ix_users_{field}" in message), None)
+
+class UserVersionMismatchError(Exception):
+    """Raised by a conditional update when the user changed since the expected version."""
+
+class LoginStatus(Enum):
+    SUCCESS = "success"
+    INVALID = "invalid"
+    LOCKED = "locked"
+
+class LoginResult(NamedTuple):
+    """Outcome of a login attempt; the user's id, email and role are set on success only."""
+    status: LoginStatus
+    user_id: Optional[UUID] = None
+    email: Optional[str] = None
+    role: Optional[UserRole] = None
+
+class UserPage(NamedTuple):
+    items: List[User]
+    total: int
+    total_estimated: bool = False
+    next_cursor: Optional[PageCursor] = None
+    prev_cursor: Optional[PageCursor] = None
+
+def _user_snapshot(user: User) -> dict:
+    """Column values of a loaded user in JSON-safe form, for the user cache."""
+    snapshot = {}
+    for column_attr in User.__table__.columns:
+        value = getattr(user, column_attr.key)
+        if isinstance(value, Enum):
+            value = value.name
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, UUID):
+            value = str(value)
+        snapshot[column_attr.key] = value
+    return snapshot
+
+def _user_from_snapshot(snapshot: dict) -> dict:
+    """Inverse of `_user_snapshot`: column values restored to their Python types."""
+    values = {}
+    for column_attr in User.__table__.columns:
+        value = snapshot.get(column_attr.key)
+        python_type = column_attr.type.python_type
+        if value is not None:
+            if issubclass(python_type, Enum):
+                value = python_type[value]
+            elif python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is UUID:
+                value = UUID(value)
+        values[column_attr.key] = value
+    return values
+
 class UserService:
+    _count_cache = TTLCache(ttl_seconds=settings.user_count_cache_ttl_seconds)
+    _user_cache = EntityCache(
+        "user",
+        ttl_seconds=settings.user_cache_ttl_seconds,
+        maxsize=settings.user_cache_size,
+        shared=create_cache_backend(settings.user_cache_shared_url),
+        shared_ttl_seconds=settings.user_cache_shared_ttl_seconds,
+    )
+
     @classmethod
     async def _execute_query(cls, session: AsyncSession, query):
+        """
+        Execute a statement in the session's current transaction without committing, so a
+        read costs a single round trip. Callers that write commit when their work is done.
+        """
         try:
-            result = await session.execute(query)
-            await session.commit()
-            return result
+            return await session.execute(query)
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}")
             await session.rollback()
@@ -33,9 +134,49 @@ class UserService:
 
     @classmethod
     async def _fetch_user(cls, session: AsyncSession, **filters) -> Optional[User]:
+        """
+        Load one user. Lookups by a single id, email or nickname are served from the user
+        cache when possible and fill it on a miss. Only rows read from the primary fill the
+        cache; a replica's row may predate a write that was already invalidated.
+        """
+        field = next(iter(filters)) if len(filters) == 1 else None
+        cacheable = settings.user_cache_enabled and field in CACHED_USER_LOOKUPS
+        if cacheable:
+            snapshot = await cls._user_cache.get(field, filters[field])
+            if snapshot is not None:
+                return cls._attach_cached_user(session, snapshot)
+        generation = cls._user_cache.fill_generation()
         query = select(User).filter_by(**filters)
         result = await cls._execute_query(session, query)
-        return result.scalars().first() if result else None
+        user = result.scalars().first() if result else None
+        if user is not None and cacheable and not session.info.get("replica"):
+            await cls._user_cache.put(_user_snapshot(user), index_fields=CACHED_USER_LOOKUPS[1:], generation=generation)
+        return user
+
+    @classmethod
+    def _attach_cached_user(cls, session: AsyncSession, snapshot: dict) -> User:
+        """
+        Turn a cached snapshot into a persistent User of this session without a query, so
+        callers can modify and commit it as if it had been loaded. A copy the session
+        already holds wins, since it may carry changes not yet committed.
+        """
+        user_id = UUID(snapshot["id"])
+        existing = session.identity_map.get(identity_key(User, user_id))
+        if existing is not None:
+            return existing
+        user = User(**_user_from_snapshot(snapshot))
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+    @classmethod
+    async def invalidate_user_cache(cls, user_id: UUID):
+        """Drop a user's cached snapshot; called after every committed change to a user."""
+        await cls._user_cache.invalidate(user_id)
+
+    @classmethod
+    def user_cache_stats(cls) -> dict:
+        return cls._user_cache.stats()
 
     @classmethod
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
@@ -49,51 +190,127 @@ class UserService:
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
         return await cls._fetch_user(session, email=email)
 
+    @classmethod
+    async def allocate_nicknames(cls, session: AsyncSession, count: int) -> List[str]:
+        """
+        Pick `count` unused nicknames, checking a batch of random candidates in one query.
+
+        With 100 million possible names the first batch almost always has enough free ones,
+        so allocation costs one round trip even with millions of users. The unique index on
+        `nickname` still guards against a concurrent registration taking the same name.
+        """
+        allocated: List[str] = []
+        while len(allocated) < count:
+            candidates = generate_nicknames(max(NICKNAME_CANDIDATES_PER_QUERY, 2 * (count - len(allocated))))
+            result = await session.execute(select(User.nickname).where(User.nickname.in_(candidates)))
+            taken = set(result.scalars().all()) | set(allocated)
+            allocated.extend(candidate for candidate in candidates if candidate not in taken)
+        return allocated[:count]
+
     @classmethod
     async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
+        """
+        Create a user with a single INSERT ... ON CONFLICT DO NOTHING RETURNING, relying on
+        the unique constraints on email and nickname instead of checking for duplicates first,
+        which is both cheaper and correct under concurrent registrations.
+
+        Raises DuplicateUserError naming the field when the email is taken. A collision on the
+        generated nickname is retried with a fresh one.
+        """
         try:
             validated_data = UserCreate(**user_data).model_dump()
-            existing_user = await cls.get_by_email(session, validated_data['email'])
-            if existing_user:
-                logger.error("User with given email already exists.")
-                return None
-            validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            new_user = User(**validated_data)
-            new_user.verification_token = generate_verification_token()
-            new_nickname = generate_nickname()
-            while await cls.get_by_nickname(session, new_nickname):
-                new_nickname = generate_nickname()
-            new_user.nickname = new_nickname
-            session.add(new_user)
-            await session.commit()
-            await email_service.send_verification_email(new_user)
-            
-            return new_user
         except ValidationError as e:
             logger.error(f"Validation error during user creation: {e}")
             return None
+        validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
+        validated_data['verification_token'] = generate_verification_token()
+        for _ in range(USER_CREATE_ATTEMPTS):
+            validated_data['nickname'] = generate_nickname()
+            query = insert(User).values(**validated_data).on_conflict_do_nothing().returning(User)
+            new_user = (await session.execute(query)).scalars().first()
+            if new_user is not None:
+                break
+            conflict = await cls._conflicting_field(session, validated_data['email'], validated_data['nickname'])
+            if conflict == "email":
+                raise DuplicateUserError("email")
+            logger.info(f"Nickname {validated_data['nickname']} was taken; retrying with another")
+        else:
+            raise DuplicateUserError("nickname")
+        # Queue the email in the same transaction so it is sent only if the user is committed
+        EmailOutboxService.enqueue(
+            session, 'email_verification', new_user.email, email_service.verification_email_context(new_user)
+        )
+        await session.commit()
+        cls.invalidate_count_cache()
+        return new_user
 
     @classmethod
-    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
-        try:
-            # validated_data = UserUpdate(**update_data).dict(exclude_unset=True)
-            validated_data = UserUpdate(**update_data).dict(exclude_unset=True)
+    async def _conflicting_field(cls, session: AsyncSession, email: str, nickname: str) -> Optional[str]:
+        """After an insert hit a conflict, find which unique field it was; None if the row is gone again."""
+        query = select(User.email == email).where(or_(User.email == email, User.nickname == nickname))
+        matches = (await session.execute(query)).scalars().all()
+        if not matches:
+            return None
+        return "email" if any(matches) else "nickname"
 
-            if 'password' in validated_data:
-                validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_user = await cls.get_by_id(session, user_id)
-            if updated_user:
-                session.refresh(updated_user)  # Explicitly refresh the updated user object
-                logger.info(f"User {user_id} updated successfully.")
-                return updated_user
-            else:
-                logger.error(f"User {user_id} not found after update attempt.")
+    @classmethod
+    async def _update_returning(cls, session: AsyncSession, criteria, values: dict, commit: bool = True) -> Optional[User]:
+        """
+        Apply `values` to the user matching `criteria` in one UPDATE ... RETURNING statement
+        and commit. The WHERE clause carries every precondition, so concurrent writers cannot
+        interleave between a check and the write, and the returned row (including the new
+        `updated_at`) replaces any copy the session holds. Returns None when no user matched,
+        and raises DuplicateUserError when the new values collide with another user's email
+        or nickname; other database errors propagate.
+
+        With `commit=False` the caller commits, after adding work of its own to the transaction,
+        and then calls `invalidate_user_cache`: invalidating before the commit would let a
+        concurrent read cache the old row again.
+        """
+        statement = update(User).where(*criteria).values(**values).returning(User)
+        query = select(User).from_statement(statement).execution_options(populate_existing=True)
+        try:
+            result = await session.execute(query)
+        except IntegrityError as e:
+            await session.rollback()
+            field = _duplicate_field(e)
+            if field is None:
+                raise
+            raise DuplicateUserError(field) from e
+        user = result.scalars().first()
+        if user is None:
             return None
-        except Exception as e:  # Broad exception handling for debugging
-            logger.error(f"Error during user update: {e}")
+        if commit:
+            await session.commit()
+            await cls.invalidate_user_cache(user.id)
+        return user
+
+    @classmethod
+    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str], expected_updated_at: Optional[datetime] = None) -> Optional[User]:
+        """
+        Update a user in a single UPDATE ... RETURNING round trip. With `expected_updated_at`,
+        the update only applies if the user was not modified since that version, and
+        UserVersionMismatchError is raised otherwise. Taking another user's email or
+        nickname raises DuplicateUserError.
+        """
+        try:
+            validated_data = UserUpdate(**update_data).dict(exclude_unset=True)
+        except ValidationError as e:
+            logger.error(f"Invalid user update: {e}")
             return None
+        if 'password' in validated_data:
+            validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
+        criteria = [User.id == user_id]
+        if expected_updated_at is not None:
+            criteria.append(User.updated_at == expected_updated_at)
+        updated_user = await cls._update_returning(session, criteria, validated_data)
+        if updated_user:
+            logger.info(f"User {user_id} updated successfully.")
+            return updated_user
+        if expected_updated_at is not None:
+            raise UserVersionMismatchError(f"User {user_id} was modified concurrently")
+        logger.error(f"User {user_id} not found for update.")
+        return None
 
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
@@ -103,40 +320,243 @@ class UserService:
             return False
         await session.delete(user)
         await session.commit()
+        await cls.invalidate_user_cache(user_id)
+        cls.invalidate_count_cache()
         return True
 
     @classmethod
     async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
+        query = select(User).order_by(User.created_at, User.id).offset(skip).limit(limit)
         result = await cls._execute_query(session, query)
         return result.scalars().all() if result else []
 
+    @classmethod
+    def _cursor_query(cls, cursor: PageCursor, limit: int):
+        """Build the keyset query for a cursor; it fetches one extra row to detect a further page."""
+        backwards = cursor.direction == PREV
+        sort_key = tuple_(User.created_at, User.id)
+        query = select(User)
+        if cursor.has_key:
+            boundary = (cursor.created_at, cursor.id)
+            query = query.where(sort_key < boundary if backwards else sort_key > boundary)
+        if backwards:
+            query = query.order_by(User.created_at.desc(), User.id.desc())
+        else:
+            query = query.order_by(User.created_at, User.id)
+        return query.limit(limit + 1)
+
+    @classmethod
+    def _cursor_page(cls, users: List[User], cursor: PageCursor, limit: int) -> Tuple[List[User], Optional[PageCursor], Optional[PageCursor]]:
+        """Trim the rows returned by `_cursor_query` into a page and the cursors around it."""
+        backwards = cursor.direction == PREV
+        has_more = len(users) > limit
+        users = users[:limit]
+        if backwards:
+            users.reverse()
+        if not users:
+            return users, None, None
+
+        first, last = users[0], users[-1]
+        next_cursor = PageCursor(NEXT, last.created_at, last.id)
+        prev_cursor = PageCursor(PREV, first.created_at, first.id)
+        if backwards:
+            return users, next_cursor if cursor.has_key else None, prev_cursor if has_more else None
+        return users, next_cursor if has_more else None, prev_cursor if cursor.has_key else None
+
+    @classmethod
+    async def list_users_by_cursor(cls, session: AsyncSession, limit: int = 10, cursor: Optional[PageCursor] = None) -> Tuple[List[User], Optional[PageCursor], Optional[PageCursor]]:
+        """
+        Fetch a page of users by seeking on the (created_at, id) index instead of using OFFSET,
+        so every page costs the same regardless of its depth.
+
+        :param session: The AsyncSession instance for database access.
+        :param limit: Maximum number of users on the page.
+        :param cursor: Position to continue from; None starts at the first page.
+        :return: The users on the page, and the cursors of the next and previous pages (None when there is none).
+        """
+        cursor = cursor or PageCursor(NEXT)
+        result = await cls._execute_query(session, cls._cursor_query(cursor, limit))
+        users = list(result.scalars().all()) if result else []
+        return cls._cursor_page(users, cursor, limit)
+
+    @classmethod
+    @asynccontextmanager
+    async def _read_only_transaction(cls, session: AsyncSession):
+        """
+        Run the enclosed reads in one READ ONLY transaction, committed when they succeed and
+        rolled back when they raise. If the session is already inside a transaction the reads
+        simply join it.
+        """
+        if session.in_transaction():
+            yield
+            return
+        await session.connection(execution_options={"postgresql_readonly": True})
+        try:
+            yield
+        except BaseException:
+            await session.rollback()
+            raise
+        await session.commit()
+
+    @classmethod
+    async def export_users(
+        cls,
+        session_factory,
+        columns: Sequence[str] = EXPORT_COLUMNS,
+        role: Optional[UserRole] = None,
+        email_verified: Optional[bool] = None,
+        is_locked: Optional[bool] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> AsyncIterator[List[RowMapping]]:
+        """
+        Stream users matching the filters, in `created_at, id` order, as lists of row mappings
+        holding the requested `columns`.
+
+        Rows are read through a server-side cursor `user_export_fetch_rows` at a time, and the
+        next batch is only fetched once the caller has consumed the previous one. The table is
+        walked in keyset chunks of `user_export_chunk_rows`, each in its own short read-only
+        transaction on a fresh session, so a full export never pins one long transaction.
+        """
+        conditions = []
+        if role is not None:
+            conditions.append(User.role == role)
+        if email_verified is not None:
+            conditions.append(User.email_verified.is_(email_verified))
+        if is_locked is not None:
+            conditions.append(User.is_locked.is_(is_locked))
+        if created_after is not None:
+            conditions.append(User.created_at >= created_after)
+        if created_before is not None:
+            conditions.append(User.created_at < created_before)
+        sort_key = tuple_(User.created_at, User.id)
+        query = (
+            select(*(getattr(User, name) for name in columns), User.created_at.label("_key_created_at"), User.id.label("_key_id"))
+            .where(*conditions)
+            .order_by(User.created_at, User.id)
+            .limit(settings.user_export_chunk_rows)
+            .execution_options(yield_per=settings.user_export_fetch_rows)
+        )
+        boundary = None
+        while True:
+            fetched = 0
+            chunk_query = query if boundary is None else query.where(sort_key > boundary)
+            async with session_factory() as session:
+                async with cls._read_only_transaction(session):
+                    result = await session.stream(chunk_query)
+                    async for rows in result.mappings().partitions():
+                        fetched += len(rows)
+                        boundary = (rows[-1]["_key_created_at"], rows[-1]["_key_id"])
+                        yield rows
+            if fetched < settings.user_export_chunk_rows:
+                return
+
+    @classmethod
+    async def list_users_page(cls, session: AsyncSession, limit: int = 10, skip: Optional[int] = None, cursor: Optional[PageCursor] = None, count_mode: CountMode = CountMode.EXACT) -> UserPage:
+        """
+        Fetch a page of users together with the listing total in a single statement.
+
+        The total rides along as a scalar subquery column (count(*) or the planner estimate),
+        so a listing costs one query inside one read-only transaction instead of a count
+        query followed by a page query. A cached count skips the subquery altogether.
+
+        :param session: The AsyncSession instance for database access.
+        :param limit: Maximum number of users on the page.
+        :param skip: Offset for legacy offset pagination; when None, keyset pagination is used.
+        :param cursor: Keyset position to continue from; None starts at the first page.
+        :param count_mode: How the total is computed, see `count_users`.
+        :return: The page of users, the total and the neighbouring cursors (keyset mode only).
+        """
+        cursor = cursor or PageCursor(NEXT)
+        if skip is None:
+            query = cls._cursor_query(cursor, limit)
+        else:
+            query = select(User).order_by(User.created_at, User.id).offset(skip).limit(limit)
+
+        cached_total = cls._count_cache.get(User.__tablename__) if count_mode == CountMode.CACHED else None
+        total, total_estimated = cached_total, False
+        if total is None:
+            if count_mode == CountMode.ESTIMATED:
+                query = query.add_columns(cls._estimate_count_query().scalar_subquery())
+                total_estimated = True
+            else:
+                query = query.add_columns(select(func.count()).select_from(User).scalar_subquery())
+
+        async with cls._read_only_transaction(session):
+            rows = (await session.execute(query)).all()
+            users = [row[0] for row in rows]
+            if total is None and rows:
+                total = rows[0][1]
+            # Pages past the end carry no total, and tables that were never analyzed have no estimate.
+            if total is None or total < 0:
+                total, total_estimated = await cls.count(session), False
+        if count_mode == CountMode.CACHED and cached_total is None:
+            cls._count_cache.set(User.__tablename__, total)
+
+        if skip is not None:
+            return UserPage(users, total, total_estimated)
+        users, next_cursor, prev_cursor = cls._cursor_page(users, cursor, limit)
+        return UserPage(users, total, total_estimated, next_cursor, prev_cursor)
+
     @classmethod
     async def register_user(cls, session: AsyncSession, user_data: Dict[str, str], get_email_service) -> Optional[User]:
         return await cls.create(session, user_data, get_email_service)
     
 
+    @classmethod
+    async def authenticate(cls, session: AsyncSession, email: str, password: str) -> LoginResult:
+        """
+        Check a login attempt with one SELECT of the columns login needs and one conditional
+        UPDATE ... RETURNING, in separate transactions so no connection is held while the
+        password hash is verified.
+
+        A failure increments `failed_login_attempts` and locks the account in the same
+        statement, in SQL, so parallel attempts cannot lose increments and lockout happens at
+        exactly `max_login_attempts`; it is committed before returning. A success resets the
+        counter only if the account is still unlocked, and is left uncommitted so the caller
+        can add the session's refresh token to the same transaction; the caller invalidates
+        the user's cache entry once it has committed.
+
+        The lookup bypasses the user cache: lock state has to be current, and the attempt
+        writes the row anyway.
+        """
+        began = not session.in_transaction()
+        query = select(
+            User.id, User.email, User.role, User.hashed_password, User.email_verified, User.is_locked
+        ).where(User.email == email)
+        result = await cls._execute_query(session, query)
+        row = result.first() if result else None
+        if began and session.in_transaction():
+            # Give the connection back before the password check, which takes far longer than
+            # either query; the UPDATE below runs in a transaction of its own
+            await session.rollback()
+        if row is None:
+            return LoginResult(LoginStatus.INVALID)
+        if row.is_locked:
+            return LoginResult(LoginStatus.LOCKED)
+        if not row.email_verified:
+            return LoginResult(LoginStatus.INVALID)
+        unlocked = [User.id == row.id, User.is_locked.is_(False)]
+        if not await verify_password_async(password, row.hashed_password):
+            attempts = User.failed_login_attempts + 1
+            await cls._update_returning(session, unlocked, dict(
+                failed_login_attempts=attempts, is_locked=attempts >= settings.max_login_attempts,
+            ))
+            return LoginResult(LoginStatus.INVALID)
+        # The account may have been locked by parallel failures while the password was checked
+        if await cls._update_returning(session, unlocked, dict(failed_login_attempts=0, last_login_at=func.now()), commit=False) is None:
+            return LoginResult(LoginStatus.LOCKED)
+        return LoginResult(LoginStatus.SUCCESS, row.id, row.email, row.role)
+
     @classmethod
     async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user:
-            if user.email_verified is False:
-                return None
-            if user.is_locked:
-                return None
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
-                return user
-            else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.is_locked = True
-                session.add(user)
-                await session.commit()
-        return None
+        """Authenticate and return the user, committing the login; None for any failure."""
+        result = await cls.authenticate(session, email, password)
+        if result.status != LoginStatus.SUCCESS:
+            return None
+        await session.commit()
+        await cls.invalidate_user_cache(result.user_id)
+        return await cls.get_by_id(session, result.user_id)
 
     @classmethod
     async def is_account_locked(cls, session: AsyncSession, email: str) -> bool:
@@ -146,28 +566,22 @@ class UserService:
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
-        hashed_password = hash_password(new_password)
-        user = await cls.get_by_id(session, user_id)
-        if user:
-            user.hashed_password = hashed_password
-            user.failed_login_attempts = 0  # Resetting failed login attempts
-            user.is_locked = False  # Unlocking the user account, if locked
-            session.add(user)
-            await session.commit()
-            return True
-        return False
+        """Set a new password, which also clears failed login attempts and unlocks the account."""
+        hashed_password = await hash_password_async(new_password)
+        updated = await cls._update_returning(
+            session, [User.id == user_id],
+            dict(hashed_password=hashed_password, failed_login_attempts=0, is_locked=False),
+        )
+        return updated is not None
 
     @classmethod
     async def verify_email_with_token(cls, session: AsyncSession, user_id: UUID, token: str) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if user and user.verification_token == token:
-            user.email_verified = True
-            user.verification_token = None  # Clear the token once used
-            user.role = UserRole.AUTHENTICATED
-            session.add(user)
-            await session.commit()
-            return True
-        return False
+        """Verify the email if `token` is the user's current token; the token is cleared, so it works once."""
+        updated = await cls._update_returning(
+            session, [User.id == user_id, User.verification_token == token],
+            dict(email_verified=True, verification_token=None, role=UserRole.AUTHENTICATED),
+        )
+        return updated is not None
 
     @classmethod
     async def count(cls, session: AsyncSession) -> int:
@@ -181,14 +595,59 @@ class UserService:
         result = await session.execute(query)
         count = result.scalar()
         return count
+
+    @classmethod
+    def _estimate_count_query(cls):
+        pg_class = table("pg_class", column("oid"), column("reltuples"))
+        return select(cast(pg_class.c.reltuples, BigInteger)).where(pg_class.c.oid == func.to_regclass(User.__tablename__))
+
+    @classmethod
+    async def estimate_count(cls, session: AsyncSession) -> Optional[int]:
+        """
+        Return the planner's row estimate for the users table from pg_class.
+
+        The value is maintained by VACUUM/ANALYZE and costs a single catalog lookup.
+        Returns None when the table has not been analyzed yet.
+        """
+        result = await session.execute(cls._estimate_count_query())
+        estimate = result.scalar()
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    @classmethod
+    async def count_users(cls, session: AsyncSession, mode: CountMode = CountMode.EXACT) -> Tuple[int, bool]:
+        """
+        Count users using the requested strategy.
+
+        :param session: The AsyncSession instance for database access.
+        :param mode: EXACT runs count(*), CACHED reuses a recent exact count and ESTIMATED
+            reads the planner statistics, falling back to an exact count when none exist.
+        :return: The count and whether it is an estimate.
+        """
+        if mode == CountMode.ESTIMATED:
+            estimate = await cls.estimate_count(session)
+            if estimate is not None:
+                return estimate, True
+        elif mode == CountMode.CACHED:
+            cached = cls._count_cache.get(User.__tablename__)
+            if cached is not None:
+                return cached, False
+            count = await cls.count(session)
+            cls._count_cache.set(User.__tablename__, count)
+            return count, False
+        return await cls.count(session), False
+
+    @classmethod
+    def invalidate_count_cache(cls):
+        """Drop the cached user count; called by every write path that adds or removes users."""
+        cls._count_cache.invalidate(User.__tablename__)
     
     @classmethod
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if user and user.is_locked:
-            user.is_locked = False
-            user.failed_login_attempts = 0  # Optionally reset failed login attempts
-            session.add(user)
-            await session.commit()
-            return True
-        return False
+        """Unlock a locked account and clear its failed login attempts; False if it was not locked."""
+        updated = await cls._update_returning(
+            session, [User.id == user_id, User.is_locked.is_(True)],
+            dict(is_locked=False, failed_login_attempts=0),
+        )
+        return updated is not None
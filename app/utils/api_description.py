@@ -26,7 +26,7 @@ The application incorporates several security measures to protect data and ensur
 
 - Data Encryption: Uses advanced encryption standards to secure sensitive data in transit and at rest.
 - Input Validation: Employs rigorous validation checks to prevent SQL injection, XSS, and other common security threats.
-- Rate Limiting: Protects against brute-force attacks by limiting the number of requests a user can make to the API within a given timeframe.
+- Rate Limiting: Protects against brute-force attacks with token buckets per client address and, on login and registration, per account. Requests over budget get 429 Too Many Requests with a Retry-After header.
 
 User Experience:
 
@@ -0,0 +1,193 @@
+"""
+Two-level cache for entity snapshots: an in-process LRU in front of an optional shared store.
+
+Entities are cached as JSON-safe dicts under `id:<id>`. Lookups by another unique field go
+through a small index entry, `<field>:<value>` -> id, and are only answered when the
+snapshot still carries that value. A stale index entry then simply misses, so dropping the
+`id:` entry is all an invalidation has to do.
+
+A fill can race an invalidation: a read that started before a write committed may try to
+cache the old row after the write invalidated it. Fills therefore carry the generation
+taken before the read (`fill_generation()`), and are dropped if the entity was invalidated
+since. In the shared store an invalidation leaves a short-lived tombstone and fills only
+write absent keys, which keeps other workers' late fills out as well.
+
+The shared store lets invalidations made by one worker reach the others. The in-process
+level keeps a short TTL, which bounds how long another worker's write can go unseen.
+"""
+
+from builtins import Exception, ImportError, RuntimeError, ValueError, dict, int, len, max, str
+import json
+import logging
+from typing import Any, Optional, Protocol, Sequence, Tuple
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# How long an invalidation keeps fills that started before it out of the cache
+INVALIDATION_GRACE_SECONDS = 10.0
+# Shared-store value marking an invalidated entity; it decodes to None, i.e. a miss
+TOMBSTONE = "null"
+
+
+class CacheBackend(Protocol):
+    """A shared key-value store holding string values with a TTL."""
+
+    async def get(self, key: str) -> Optional[str]: ...
+
+    async def set(self, key: str, value: str, ttl_seconds: float, only_if_absent: bool = False): ...
+
+
+class LocalCacheBackend:
+    """In-process stand-in for a shared store, used in tests and single-worker setups."""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self._entries = TTLCache(ttl_seconds=0, maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: str, ttl_seconds: float, only_if_absent: bool = False):
+        if only_if_absent and self._entries.get(key) is not None:
+            return
+        self._entries.set(key, value, ttl_seconds=ttl_seconds)
+
+
+class RedisCacheBackend:
+    """Shared store on Redis. Requires the optional `redis` package."""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("A redis:// cache URL requires the 'redis' package") from e
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl_seconds: float, only_if_absent: bool = False):
+        await self._client.set(key, value, ex=max(1, int(ttl_seconds)), nx=only_if_absent)
+
+
+def create_cache_backend(url: str) -> Optional[CacheBackend]:
+    """Build the shared store for a URL: '' for none, 'local://' for the stand-in, or 'redis://...'."""
+    if not url:
+        return None
+    if url.startswith("local://"):
+        return LocalCacheBackend()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
+
+
+class EntityCache:
+    def __init__(self, namespace: str, ttl_seconds: float, maxsize: int,
+                 shared: Optional[CacheBackend] = None, shared_ttl_seconds: Optional[float] = None):
+        self.namespace = namespace
+        self.shared = shared
+        self.shared_ttl_seconds = shared_ttl_seconds or ttl_seconds
+        self._local = TTLCache(ttl_seconds=ttl_seconds, maxsize=maxsize)
+        # Entity id -> generation of its latest invalidation
+        self._invalidated = TTLCache(ttl_seconds=INVALIDATION_GRACE_SECONDS, maxsize=maxsize)
+        self._generation = 0
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.shared_errors = 0
+        self.stale_fills = 0
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def _get(self, key: str) -> Tuple[Any, bool]:
+        """Return the cached value and whether it came from the shared store."""
+        value = self._local.get(key)
+        if value is not None or self.shared is None:
+            return value, False
+        try:
+            encoded = await self.shared.get(self._shared_key(key))
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared cache read failed: {e}")
+            return None, False
+        if encoded is None:
+            return None, False
+        value = json.loads(encoded)
+        if value is None:
+            # A tombstone: a miss, which must not take a local slot from a live entry
+            return None, False
+        self._local.set(key, value)
+        return value, True
+
+    async def _set(self, key: str, value: Any, only_if_absent: bool = False):
+        self._local.set(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(self._shared_key(key), json.dumps(value), self.shared_ttl_seconds, only_if_absent)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache write failed: {e}")
+
+    async def get(self, field: str, value: Any) -> Optional[dict]:
+        """Return the snapshot whose `field` equals `value`, or None on a miss."""
+        value = str(value)
+        entity_id, index_shared = (value, False) if field == "id" else await self._get(f"{field}:{value}")
+        snapshot, snapshot_shared = await self._get(f"id:{entity_id}") if entity_id is not None else (None, False)
+        if snapshot is None or str(snapshot.get(field)) != value:
+            self.misses += 1
+            return None
+        if index_shared or snapshot_shared:
+            self.shared_hits += 1
+        else:
+            self.local_hits += 1
+        return snapshot
+
+    def fill_generation(self) -> int:
+        """Take before reading an entity from its source; pass the result to `put`."""
+        return self._generation
+
+    async def put(self, snapshot: dict, index_fields: Sequence[str] = (), generation: Optional[int] = None):
+        """
+        Cache a JSON-safe snapshot (with an `id`) and index it by `index_fields`. With the
+        `generation` taken before the snapshot was read, the fill is dropped if the entity
+        has been invalidated since, and does not replace what the shared store holds.
+        """
+        entity_id = str(snapshot["id"])
+        if generation is not None and (self._invalidated.get(entity_id) or 0) > generation:
+            self.stale_fills += 1
+            return
+        await self._set(f"id:{entity_id}", snapshot, only_if_absent=generation is not None)
+        for field in index_fields:
+            if snapshot.get(field) is not None:
+                await self._set(f"{field}:{snapshot[field]}", entity_id)
+
+    async def invalidate(self, entity_id: Any):
+        key = f"id:{entity_id}"
+        self._generation += 1
+        self._invalidated.set(str(entity_id), self._generation)
+        self._local.invalidate(key)
+        if self.shared is not None:
+            try:
+                await self.shared.set(self._shared_key(key), TOMBSTONE, INVALIDATION_GRACE_SECONDS)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache invalidation failed: {e}")
+
+    def clear(self):
+        self._local.clear()
+        self._invalidated.clear()
+        self.local_hits = self.shared_hits = self.misses = self.shared_errors = self.stale_fills = 0
+
+    def stats(self) -> dict:
+        hits = self.local_hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self._local),
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "shared_errors": self.shared_errors,
+            "stale_fills": self.stale_fills,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,52 @@
+"""
+Entity tags for conditional requests.
+
+A user's tag is derived from its id and `updated_at`, which the database bumps on every
+change, so a tag can be computed and compared before any response body is built. Both kinds
+of tag also cover whatever else shapes the representation, such as the links mode and the
+base URL the links are built from. List tags cover every item's id and `updated_at` plus the
+page metadata and query string, since the links in a page depend on them.
+"""
+
+from builtins import bool, str
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+
+# Authenticated responses may only be cached by the client, which must revalidate each use
+CACHE_CONTROL = "private, no-cache"
+
+
+def _tag(*parts: str) -> str:
+    return '"' + hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def user_etag(user_id: UUID, updated_at: Optional[datetime], *representation: str) -> str:
+    return _tag(str(user_id), updated_at.isoformat() if updated_at else "", *(str(part) for part in representation))
+
+
+def list_etag(items: Iterable[Tuple[UUID, Optional[datetime]]], *metadata: str) -> str:
+    parts = [str(part) for part in metadata]
+    parts.extend(f"{item_id}@{updated_at.isoformat() if updated_at else ''}" for item_id, updated_at in items)
+    return _tag(*parts)
+
+
+def _tags(header: str):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """True when `If-None-Match` lists the current tag, i.e. the client's copy is current (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = _tags(if_none_match)
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def match(if_match: Optional[str], etag: str) -> bool:
+    """True when `If-Match` is absent, `*` or lists the current tag (strong comparison)."""
+    if not if_match:
+        return True
+    tags = _tags(if_match)
+    return "*" in tags or etag in tags
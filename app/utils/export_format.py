@@ -0,0 +1,44 @@
+"""
+Encoding of exported rows as NDJSON or CSV, one output chunk per batch of rows.
+
+Each batch becomes a single bytes chunk, so a streaming response makes one write per
+cursor fetch rather than one per row.
+"""
+
+from builtins import bytes, dict, isinstance, str
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import List, Sequence
+from uuid import UUID
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def ndjson_chunk(rows: List[dict], columns: Sequence[str]) -> bytes:
+    lines = [json.dumps({name: _plain(row[name]) for name in columns}, separators=(",", ":")) for row in rows]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def csv_header(columns: Sequence[str]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode("utf-8")
+
+
+def csv_chunk(rows: List[dict], columns: Sequence[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[name] is None else _plain(row[name]) for name in columns])
+    return buffer.getvalue().encode("utf-8")
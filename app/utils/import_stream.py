@@ -0,0 +1,123 @@
+"""
+Incremental parsing of uploaded NDJSON and CSV files.
+
+The request body is consumed chunk by chunk and turned into records as complete lines
+arrive, so only the current chunk, the current line and the current batch are ever held in
+memory, whatever the size of the upload. Lines longer than `MAX_LINE_CHARS` are discarded
+as they arrive and reported as bad rows.
+"""
+
+from builtins import ValueError, bytes, dict, int, isinstance, len, list, next, str, zip
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+# An upload without line breaks would otherwise be buffered whole
+MAX_LINE_CHARS = 65536
+# A quoted CSV value left open would otherwise swallow the rest of the upload
+MAX_CSV_RECORD_CHARS = 65536
+
+
+class ImportRow(NamedTuple):
+    """One uploaded record: its 1-based row number and either its fields or a parse error."""
+    row: int
+    data: Optional[dict] = None
+    error: Optional[str] = None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Split a stream of UTF-8 byte chunks into lines, without their line endings. A line
+    longer than `MAX_LINE_CHARS` is dropped while it streams in and yields None instead.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    overlong = False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if overlong or len(line) > MAX_LINE_CHARS:
+                overlong = False
+                yield None
+            else:
+                yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_CHARS:
+            overlong = True
+            pending = ""
+    pending += decoder.decode(b"", final=True)
+    if overlong or len(pending) > MAX_LINE_CHARS:
+        yield None
+    elif pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    """One JSON object per line; blank lines are skipped but still counted as rows."""
+    row = 0
+    async for line in iter_lines(chunks):
+        row += 1
+        if line is None:
+            yield ImportRow(row, error="Line too long")
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield ImportRow(row, error=f"Invalid JSON: {e}")
+            continue
+        if isinstance(data, dict):
+            yield ImportRow(row, data=data)
+        else:
+            yield ImportRow(row, error="Expected a JSON object")
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    """
+    CSV with a header row naming the fields. Quoted values may span lines; empty values are
+    treated as missing. Row numbers count records after the header.
+    """
+    header: Optional[List[str]] = None
+    record = ""
+    row = 0
+    async for line in iter_lines(chunks):
+        if line is None:
+            row += 1
+            yield ImportRow(row, error="Record too long or unterminated quoted value")
+            record = ""
+            continue
+        record = f"{record}\n{line}" if record else line
+        # An odd number of quotes means a quoted value continues on the next line
+        if record.count('"') % 2:
+            if len(record) > MAX_CSV_RECORD_CHARS:
+                row += 1
+                yield ImportRow(row, error="Record too long or unterminated quoted value")
+                record = ""
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield ImportRow(row, error=f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield ImportRow(row, data={name: value for name, value in zip(header, values) if value != ""})
+    if record:
+        yield ImportRow(row + 1, error="Unterminated quoted value")
+
+
+async def batched(rows: AsyncIterator[ImportRow], size: int) -> AsyncIterator[List[ImportRow]]:
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
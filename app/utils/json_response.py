@@ -0,0 +1,36 @@
+"""
+JSON responses rendered by pydantic-core's serializer.
+
+`FastJSONResponse` is the application's default response class; it replaces the stdlib
+`json` encoder for everything FastAPI serializes itself. `ModelResponse` goes further for
+models built from trusted data such as our own database rows: a route that returns a
+`Response` bypasses FastAPI's `response_model` validation and `jsonable_encoder` pass, so
+the model is serialized exactly once and never validated again.
+"""
+
+from builtins import bytes, int
+from typing import Any, Mapping, Optional
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, Response
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+class ModelResponse(Response):
+    """Serialize an already-built model as is. Only use it for models from trusted sources."""
+
+    media_type = "application/json"
+
+    def __init__(self, content: BaseModel, status_code: int = 200, headers: Optional[Mapping[str, str]] = None,
+                 background: Optional[BackgroundTask] = None):
+        super().__init__(content, status_code, headers, self.media_type, background)
+
+    def render(self, content: BaseModel) -> bytes:
+        # Trusted models are often built with model_construct, whose values may be looser
+        # than the declared types (plain strings for URLs, ORM enums), which is fine here
+        return content.__pydantic_serializer__.to_json(content, warnings=False)
@@ -0,0 +1,121 @@
+"""
+Asymmetric signing keys for access tokens.
+
+Tokens are signed with the private half of the current key and carry its `kid` header, so
+any service holding the published public keys (the JWKS document) can verify them without
+calling back to this service. Rotating keys works in three phases:
+
+1. A new key is published ahead of use (its `activates_at` lies in the future), so
+   verifiers refresh their JWKS cache before tokens signed with it appear.
+2. Once active, the newest active key signs every new token.
+3. The key it replaced stays published for `grace_seconds`, so tokens it signed
+   remain valid until they expire; after that it is dropped.
+"""
+
+from builtins import ValueError, bytes, dict, enumerate, float, isinstance, list, sorted, str, zip
+import base64
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "RS256")
+
+# Members that identify a public key, per RFC 7638, by key type
+_THUMBPRINT_MEMBERS = {"OKP": ("crv", "kty", "x"), "RSA": ("e", "kty", "n")}
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class SigningKey:
+    """A private key, the algorithm it signs with and the time it starts signing."""
+
+    def __init__(self, private_key, activates_at: float):
+        if isinstance(private_key, ed25519.Ed25519PrivateKey):
+            self.algorithm = "EdDSA"
+            jwk = OKPAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+        elif isinstance(private_key, rsa.RSAPrivateKey):
+            self.algorithm = "RS256"
+            jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+        else:
+            raise ValueError("Only Ed25519 and RSA keys are supported for token signing")
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self.activates_at = activates_at
+        members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk["kty"]]}
+        canonical = json.dumps(members, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        self.kid = _b64url(hashlib.sha256(canonical).digest())
+        self.public_jwk = {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+    @classmethod
+    def generate(cls, algorithm: str, activates_at: float) -> "SigningKey":
+        if algorithm == "EdDSA":
+            return cls(ed25519.Ed25519PrivateKey.generate(), activates_at)
+        if algorithm == "RS256":
+            return cls(rsa.generate_private_key(public_exponent=65537, key_size=2048), activates_at)
+        raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+
+class KeySet:
+    """The keys currently published; see the module docstring for the rotation rules."""
+
+    def __init__(self, keys: List[SigningKey], grace_seconds: float, clock: Callable[[], float] = time.time):
+        if not keys:
+            raise ValueError("A key set needs at least one key")
+        self.keys = sorted(keys, key=lambda key: key.activates_at)
+        self.grace_seconds = grace_seconds
+        self._clock = clock
+
+    @classmethod
+    def generate(cls, algorithm: str, grace_seconds: float, clock: Callable[[], float] = time.time) -> "KeySet":
+        return cls([SigningKey.generate(algorithm, clock())], grace_seconds, clock)
+
+    @classmethod
+    def from_directory(cls, directory: str, grace_seconds: float, publish_seconds: float,
+                       clock: Callable[[], float] = time.time) -> "KeySet":
+        """
+        Load every `*.pem` private key in `directory`. A key starts signing `publish_seconds`
+        after its file appeared (file mtime); the oldest key signs immediately.
+        """
+        paths = sorted(Path(directory).glob("*.pem"), key=lambda path: path.stat().st_mtime)
+        if not paths:
+            raise ValueError(f"No *.pem signing keys found in {directory}")
+        keys = []
+        for index, path in enumerate(paths):
+            private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+            activates_at = path.stat().st_mtime + (publish_seconds if index else 0)
+            keys.append(SigningKey(private_key, activates_at))
+        return cls(keys, grace_seconds, clock)
+
+    def rotate(self, key: SigningKey):
+        """Add a key; it signs from its `activates_at` and retires the key active before it."""
+        self.keys = sorted(self.keys + [key], key=lambda existing: existing.activates_at)
+
+    def signing_key(self) -> SigningKey:
+        now = self._clock()
+        active = [key for key in self.keys if key.activates_at <= now]
+        return active[-1] if active else self.keys[0]
+
+    def _published(self) -> List[SigningKey]:
+        now = self._clock()
+        published = []
+        for key, successor in zip(self.keys, self.keys[1:] + [None]):
+            # A key retires when its successor starts signing, then lingers for the grace period
+            if successor is None or now < successor.activates_at + self.grace_seconds:
+                published.append(key)
+        return published
+
+    def verification_key(self, kid: str) -> Optional[SigningKey]:
+        for key in self._published():
+            if key.kid == kid:
+                return key
+        return None
+
+    def jwks(self) -> dict:
+        return {"keys": [key.public_jwk for key in self._published()]}
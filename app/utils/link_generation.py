@@ -1,43 +1,71 @@
-from builtins import dict, int, max, str
-from typing import List, Callable
+from builtins import dict, int, max, str, tuple
+from functools import lru_cache
+from typing import List, Callable, Optional, Tuple
 from urllib.parse import urlencode
 from uuid import UUID
 
 from fastapi import Request
-from app.schemas.link_schema import Link
+from app.schemas.link_schema import Link, LinkMode
 from app.schemas.pagination_schema import PaginationLink
+from app.utils.pagination_cursor import PREV, PageCursor, encode_cursor
 
 # Utility function to create a link
 def create_link(rel: str, href: str, method: str = "GET", action: str = None) -> Link:
     return Link(rel=rel, href=href, method=method, action=action)
 
+def _trusted_link(rel: str, href: str, action: str) -> Link:
+    # Links built from our own routes and base URL are valid by construction; skip HttpUrl parsing.
+    return Link.model_construct(rel=rel, href=href, action=action, type="application/json")
+
 def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationLink:
     # Ensure parameters are added in a specific order
     query_string = f"skip={params['skip']}&limit={params['limit']}"
-    return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
+    return PaginationLink.model_construct(rel=rel, href=f"{base_url}?{query_string}")
+
+def create_cursor_pagination_link(rel: str, base_url: str, limit: int, cursor: Optional[str] = None) -> PaginationLink:
+    query_string = f"limit={limit}" if cursor is None else f"limit={limit}&cursor={cursor}"
+    return PaginationLink.model_construct(rel=rel, href=f"{base_url}?{query_string}")
+
+def _base_url(request: Request) -> str:
+    # Drop the incoming query string; pagination links carry their own parameters.
+    return str(request.url).split("?", 1)[0]
+
+USER_LINK_ACTIONS = (
+    ("self", "get_user", "view"),
+    ("update", "update_user", "update"),
+    ("delete", "delete_user", "delete"),
+)
 
-def create_user_links(user_id: UUID, request: Request) -> List[Link]:
+@lru_cache(maxsize=8)
+def _user_link_paths(app) -> Tuple[Tuple[str, str, str], ...]:
+    """Resolve the user routes once per application into path templates with a `{user_id}` slot."""
+    return tuple((rel, app.url_path_for(route, user_id="{user_id}"), action) for rel, route, action in USER_LINK_ACTIONS)
+
+def create_user_links(user_id: UUID, request: Request, mode: LinkMode = LinkMode.FULL) -> List[Link]:
     """
-    Generate navigation links for user actions.
+    Generate navigation links for user actions by filling precomputed route templates.
+
+    `minimal` returns only the `self` link and `none` returns no links.
     """
-    actions = [
-        ("self", "get_user", "GET", "view"),
-        ("update", "update_user", "PUT", "update"),
-        ("delete", "delete_user", "DELETE", "delete")
-    ]
-    return [
-        create_link(rel, str(request.url_for(action, user_id=str(user_id))), method, action_desc)
-        for rel, action, method, action_desc in actions
-    ]
-
-def generate_pagination_links(request: Request, skip: int, limit: int, total_items: int) -> List[PaginationLink]:
-    base_url = str(request.url)
+    if mode == LinkMode.NONE:
+        return []
+    base_url = str(request.base_url).rstrip("/")
+    user_id = str(user_id)
+    templates = _user_link_paths(request.app)
+    if mode == LinkMode.MINIMAL:
+        templates = templates[:1]
+    return [_trusted_link(rel, base_url + path.replace("{user_id}", user_id), action) for rel, path, action in templates]
+
+def generate_pagination_links(request: Request, skip: int, limit: int, total_items: int, mode: LinkMode = LinkMode.FULL) -> List[PaginationLink]:
+    """Offset pagination links; `minimal` drops `first` and `last`, `none` returns no links."""
+    if mode == LinkMode.NONE:
+        return []
+    base_url = _base_url(request)
     total_pages = (total_items + limit - 1) // limit
-    links = [
-        create_pagination_link("self", base_url, {'skip': skip, 'limit': limit}),
-        create_pagination_link("first", base_url, {'skip': 0, 'limit': limit}),
-        create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit})
-    ]
+    links = [create_pagination_link("self", base_url, {'skip': skip, 'limit': limit})]
+    if mode == LinkMode.FULL:
+        links.append(create_pagination_link("first", base_url, {'skip': 0, 'limit': limit}))
+        links.append(create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit}))
 
     if skip + limit < total_items:
         links.append(create_pagination_link("next", base_url, {'skip': skip + limit, 'limit': limit}))
@@ -46,3 +74,25 @@ def generate_pagination_links(request: Request, skip: int, limit: int, total_ite
         links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
 
     return links
+
+def generate_cursor_pagination_links(request: Request, limit: int, cursor: Optional[str], next_cursor: Optional[str], prev_cursor: Optional[str], mode: LinkMode = LinkMode.FULL) -> List[PaginationLink]:
+    """
+    Generate links for keyset pagination. Cursors are opaque tokens, so "first" and "last"
+    are expressed as cursors that start from either end of the listing. `minimal` drops
+    `first` and `last`, `none` returns no links.
+    """
+    if mode == LinkMode.NONE:
+        return []
+    base_url = _base_url(request)
+    links = [create_cursor_pagination_link("self", base_url, limit, cursor)]
+    if mode == LinkMode.FULL:
+        links.append(create_cursor_pagination_link("first", base_url, limit))
+        links.append(create_cursor_pagination_link("last", base_url, limit, encode_cursor(PageCursor(PREV))))
+
+    if next_cursor:
+        links.append(create_cursor_pagination_link("next", base_url, limit, next_cursor))
+
+    if prev_cursor:
+        links.append(create_cursor_pagination_link("prev", base_url, limit, prev_cursor))
+
+    return links
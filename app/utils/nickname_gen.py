@@ -1,10 +1,54 @@
-from builtins import str
+from builtins import ValueError, int, len, range, str
 import random
+from typing import List
+
+ADJECTIVES = [
+    "agile", "amber", "ancient", "arctic", "azure", "bold", "brave", "breezy", "bright", "brisk",
+    "calm", "candid", "cheerful", "clever", "cosmic", "crimson", "crisp", "curious", "daring", "dapper",
+    "dashing", "dazzling", "eager", "electric", "emerald", "epic", "fancy", "fearless", "fierce", "fluffy",
+    "frosty", "gentle", "giddy", "golden", "graceful", "grand", "happy", "hardy", "hasty", "humble",
+    "icy", "jade", "jolly", "jovial", "keen", "kind", "lively", "lucky", "lunar", "mellow",
+    "merry", "mighty", "misty", "modest", "nimble", "noble", "patient", "peppy", "plucky", "polar",
+    "proud", "quick", "quiet", "quirky", "radiant", "rapid", "rosy", "rustic", "sage", "scarlet",
+    "serene", "shiny", "silent", "silver", "sleek", "sly", "snowy", "solar", "spry", "steady",
+    "stellar", "stormy", "sunny", "swift", "tidy", "tiny", "tranquil", "trusty", "velvet", "vivid",
+    "wandering", "warm", "wild", "wily", "windy", "wise", "witty", "young", "zany", "zesty",
+]
+
+ANIMALS = [
+    "albatross", "alpaca", "antelope", "armadillo", "badger", "bat", "bear", "beaver", "bison", "bobcat",
+    "buffalo", "camel", "caribou", "cheetah", "chipmunk", "cobra", "condor", "cougar", "coyote", "crane",
+    "crow", "deer", "dingo", "dolphin", "donkey", "dove", "eagle", "eel", "elk", "emu",
+    "falcon", "ferret", "finch", "flamingo", "fox", "gazelle", "gecko", "gibbon", "giraffe", "goose",
+    "gorilla", "hare", "hawk", "hedgehog", "heron", "hippo", "horse", "hyena", "ibis", "iguana",
+    "impala", "jackal", "jaguar", "kangaroo", "kestrel", "kiwi", "koala", "lemur", "leopard", "lion",
+    "llama", "lynx", "macaw", "magpie", "manatee", "marmot", "meerkat", "mink", "moose", "narwhal",
+    "newt", "ocelot", "octopus", "orca", "osprey", "otter", "owl", "panda", "panther", "parrot",
+    "pelican", "penguin", "puffin", "puma", "quail", "rabbit", "raccoon", "raven", "robin", "salmon",
+    "seal", "sparrow", "stork", "swan", "tapir", "tiger", "toucan", "walrus", "wolf", "yak",
+]
+
+# 100 adjectives x 100 animals x 10,000 numbers = 100 million distinct nicknames
+MAX_NUMBER = 9999
+VOCABULARY_SIZE = len(ADJECTIVES) * len(ANIMALS) * (MAX_NUMBER + 1)
 
 
 def generate_nickname() -> str:
     """Generate a URL-safe nickname using adjectives and animal names."""
-    adjectives = ["clever", "jolly", "brave", "sly", "gentle"]
-    animals = ["panda", "fox", "raccoon", "koala", "lion"]
-    number = random.randint(0, 999)
-    return f"{random.choice(adjectives)}_{random.choice(animals)}_{number}"
+    number = random.randint(0, MAX_NUMBER)
+    return f"{random.choice(ADJECTIVES)}_{random.choice(ANIMALS)}_{number}"
+
+
+def generate_nicknames(count: int) -> List[str]:
+    """
+    Generate `count` distinct nicknames, to be checked against the database in one query.
+    They are drawn without replacement, so this never retries; raises ValueError if
+    `count` exceeds `VOCABULARY_SIZE`.
+    """
+    if count > VOCABULARY_SIZE:
+        raise ValueError(f"Cannot generate {count} distinct nicknames from {VOCABULARY_SIZE} possible names")
+    numbers = MAX_NUMBER + 1
+    return [
+        f"{ADJECTIVES[index // (len(ANIMALS) * numbers)]}_{ANIMALS[index // numbers % len(ANIMALS)]}_{index % numbers}"
+        for index in random.sample(range(VOCABULARY_SIZE), count)
+    ]
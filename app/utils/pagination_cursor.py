@@ -0,0 +1,58 @@
+from builtins import ValueError, isinstance, len, str
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+NEXT = "next"
+PREV = "prev"
+
+
+class PageCursor(NamedTuple):
+    """
+    Position in a keyset-paginated listing ordered by (created_at, id).
+
+    A cursor without a key points at one end of the listing: the first page when
+    the direction is "next" and the last page when the direction is "prev".
+    """
+    direction: str = NEXT
+    created_at: Optional[datetime] = None
+    id: Optional[UUID] = None
+
+    @property
+    def has_key(self) -> bool:
+        return self.created_at is not None and self.id is not None
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """Serialize a cursor into an opaque, URL-safe token."""
+    payload = {"d": cursor.direction}
+    if cursor.has_key:
+        payload["k"] = [cursor.created_at.isoformat(), str(cursor.id)]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> PageCursor:
+    """
+    Parse a token produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the token is malformed or was not produced by this module.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        direction = payload["d"]
+        if direction not in (NEXT, PREV):
+            raise ValueError(f"Unknown cursor direction: {direction}")
+        key = payload.get("k")
+        if key is None:
+            return PageCursor(direction)
+        if not isinstance(key, list) or len(key) != 2:
+            raise ValueError("Malformed cursor key")
+        return PageCursor(direction, datetime.fromisoformat(key[0]), UUID(key[1]))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
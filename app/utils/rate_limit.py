@@ -0,0 +1,158 @@
+"""
+Token-bucket rate limiting.
+
+Every key (a client address, an account) owns a bucket holding up to `capacity` tokens that
+refills at `capacity / per_seconds` tokens per second. A request takes one token, or is
+refused with the time until one is available, which becomes its `Retry-After`.
+
+Buckets live in a store. The in-process store limits each worker separately; a shared
+store (Redis) makes the budget hold across all workers. The shared store is updated
+atomically by a script, and when it fails the limiter falls back to the in-process store
+rather than letting traffic through unchecked.
+"""
+
+from builtins import Exception, ImportError, RuntimeError, ValueError, dict, float, int, len, max, min, str
+import logging
+import time
+from typing import Callable, NamedTuple, Optional, Protocol
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class RateBudget(NamedTuple):
+    """`capacity` requests per `per_seconds`, with bursts of up to `capacity`."""
+    capacity: int
+    per_seconds: float = 60.0
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+
+class RateLimitStore(Protocol):
+    async def take(self, key: str, budget: RateBudget) -> float:
+        """Take a token from `key`'s bucket; return 0 if one was taken, else seconds until one is available."""
+        ...
+
+
+class LocalRateLimitStore:
+    """
+    Buckets in process memory; also the stand-in for a shared store in tests and single-worker setups.
+
+    Full buckets expire on their own. Past `maxsize` buckets, the least recently used one is
+    dropped even if partly drained, which hands its key a fresh budget; such evictions are
+    counted, and a steady count means the store is too small for the number of clients.
+    """
+
+    def __init__(self, maxsize: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._buckets = TTLCache(ttl_seconds=0, maxsize=maxsize, clock=clock)
+
+    async def take(self, key: str, budget: RateBudget) -> float:
+        now = self._clock()
+        tokens, updated_at = self._buckets.get(key) or (float(budget.capacity), now)
+        tokens = min(float(budget.capacity), tokens + (now - updated_at) * budget.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / budget.rate
+        # A bucket that has refilled completely is the same as no bucket, so it may expire then
+        self._buckets.set(key, (tokens, now), ttl_seconds=(budget.capacity - tokens) / budget.rate + 1)
+        return wait
+
+    def clear(self):
+        self._buckets.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._buckets), "evictions": self._buckets.evictions}
+
+
+# Refill and take in one step on the server, using the server's clock so all workers agree.
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimitStore:
+    """Buckets shared by all workers on Redis. Requires the optional `redis` package."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("A redis:// rate limit store URL requires the 'redis' package") from e
+        self._client = redis.from_url(url, decode_responses=True)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+        self._prefix = prefix
+
+    async def take(self, key: str, budget: RateBudget) -> float:
+        return float(await self._take(keys=[f"{self._prefix}:{key}"], args=[budget.capacity, budget.rate]))
+
+
+def create_rate_limit_store(url: str) -> Optional[RateLimitStore]:
+    """Build the shared bucket store for a URL: '' for none, 'local://' for the stand-in, or 'redis://...'."""
+    if not url:
+        return None
+    if url.startswith("local://"):
+        return LocalRateLimitStore()
+    if url.startswith(("redis://", "rediss://")):
+        return RedisRateLimitStore(url)
+    raise ValueError(f"Unsupported rate limit store URL: {url}")
+
+
+class RateLimiter:
+    def __init__(self, shared: Optional[RateLimitStore] = None, local: Optional[LocalRateLimitStore] = None):
+        self.shared = shared
+        self.local = local or LocalRateLimitStore()
+        self.allowed = 0
+        self.rejected = 0
+        self.shared_errors = 0
+
+    async def hit(self, key: str, budget: RateBudget) -> float:
+        """Count a request against `key`; return 0 if it is allowed, else the seconds to wait."""
+        wait = None
+        if self.shared is not None:
+            try:
+                wait = await self.shared.take(key, budget)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared rate limit store failed, limiting locally: {e}")
+        if wait is None:
+            wait = await self.local.take(key, budget)
+        if wait > 0:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return max(wait, 0.0)
+
+    def clear(self):
+        self.local.clear()
+        self.allowed = self.rejected = self.shared_errors = 0
+
+    def stats(self) -> dict:
+        local = self.local.stats()
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "shared_errors": self.shared_errors,
+            "local_buckets": local["size"],
+            "local_evictions": local["evictions"],
+        }
@@ -1,8 +1,12 @@
 # app/security.py
-from builtins import Exception, ValueError, bool, int, str
+from builtins import Exception, RuntimeError, ValueError, bool, int, str
+import asyncio
 import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 import bcrypt
 from logging import getLogger
+from settings.config import settings
 
 # Set up logging
 logger = getLogger(__name__)
@@ -49,5 +53,62 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         logger.error("Error verifying password: %s", e)
         raise ValueError("Authentication process encountered an unexpected error") from e
 
+class PasswordHashingBusyError(RuntimeError):
+    """Raised when the password hashing pool already has its maximum number of pending jobs."""
+
+
+# bcrypt releases the GIL while it works, so a thread pool keeps the event loop
+# free without the pickling overhead of a process pool.
+_executor: Optional[ThreadPoolExecutor] = None
+_pending_jobs = 0
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+        )
+    return _executor
+
+async def _run_in_pool(func, *args):
+    """Run a blocking hashing function in the worker pool, enforcing the queue-depth limit."""
+    global _pending_jobs
+    if _pending_jobs >= settings.password_hash_max_pending:
+        logger.warning("Password hashing pool saturated (%d pending jobs)", _pending_jobs)
+        raise PasswordHashingBusyError("Password hashing pool is saturated")
+    _pending_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending_jobs -= 1
+
+async def hash_password_async(password: str, rounds: int = 12) -> str:
+    """
+    Hashes a password in the worker pool so the event loop is not blocked.
+
+    Raises:
+        ValueError: If hashing the password fails.
+        PasswordHashingBusyError: If the pool has too many pending jobs.
+    """
+    return await _run_in_pool(hash_password, password, rounds)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a password in the worker pool so the event loop is not blocked.
+
+    Raises:
+        ValueError: If the hashed password format is incorrect or the function fails to verify.
+        PasswordHashingBusyError: If the pool has too many pending jobs.
+    """
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+def shutdown_password_pool():
+    """Stop the hashing worker threads; a new pool is created on next use."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
 def generate_verification_token():
     return secrets.token_urlsafe(16)  # Generates a secure 16-byte URL-safe token
\ No newline at end of file
@@ -1,31 +1,127 @@
 # smtp_client.py
-from builtins import Exception, int, str
-import smtplib
+from builtins import Exception, float, int, str
+import asyncio
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from settings.config import settings
+from typing import List, Optional
+import aiosmtplib
 import logging
 
+class _PooledConnection:
+    """An authenticated SMTP session plus the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
 class SMTPClient:
-    def __init__(self, server: str, port: int, username: str, password: str):
+    """
+    Non-blocking SMTP client that keeps a small pool of authenticated sessions open.
+
+    Each session carries many messages before it is recycled, so the TCP connect, STARTTLS
+    and LOGIN are paid once per session instead of once per email. At most `pool_size`
+    messages are in flight at a time; sessions idle for longer than `idle_timeout` are
+    replaced because most servers drop them.
+
+    Commands within a message are not pipelined (RFC 2920) even when the server offers
+    PIPELINING: aiosmtplib's protocol expects exactly one reply per command it awaits and
+    drops replies that arrive together. Round trips are overlapped across the pooled
+    sessions instead, which send up to `pool_size` messages concurrently.
+    """
+
+    def __init__(self, server: str, port: int, username: str, password: str,
+                 use_tls: bool = True, pool_size: int = 2, idle_timeout: float = 60.0,
+                 max_messages_per_connection: int = 100, timeout: float = 30.0):
         self.server = server
         self.port = port
         self.username = username
         self.password = password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self._idle: List[_PooledConnection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_to_running_loop(self):
+        # Sessions belong to the loop that opened them; start afresh if the loop changed.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._idle = []
+            self._semaphore = asyncio.Semaphore(self.pool_size)
 
-    def send_email(self, subject: str, html_content: str, recipient: str):
+    async def _connect(self) -> _PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.server,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            start_tls=self.use_tls,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        return _PooledConnection(smtp)
+
+    async def _acquire(self) -> _PooledConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            if time.monotonic() - connection.last_used < self.idle_timeout and connection.smtp.is_connected:
+                return connection
+            await self._discard(connection)
+        return await self._connect()
+
+    async def _release(self, connection: _PooledConnection):
+        connection.last_used = time.monotonic()
+        if connection.messages_sent >= self.max_messages_per_connection:
+            await self._discard(connection)
+        else:
+            self._idle.append(connection)
+
+    @staticmethod
+    async def _discard(connection: _PooledConnection):
         try:
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = self.username
-            message['To'] = recipient
-            message.attach(MIMEText(html_content, 'html'))
-
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.starttls()  # Use TLS
-                server.login(self.username, self.password)
-                server.sendmail(self.username, recipient, message.as_string())
-            logging.info(f"Email sent to {recipient}")
-        except Exception as e:
-            logging.error(f"Failed to send email: {str(e)}")
-            raise
+            await connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    @staticmethod
+    def _build_message(subject: str, html_content: str, sender: str, recipient: str) -> MIMEMultipart:
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = sender
+        message['To'] = recipient
+        message.attach(MIMEText(html_content, 'html'))
+        return message
+
+    async def send_email(self, subject: str, html_content: str, recipient: str):
+        self._bind_to_running_loop()
+        message = self._build_message(subject, html_content, self.username, recipient)
+        async with self._semaphore:
+            connection = None
+            try:
+                connection = await self._acquire()
+                try:
+                    await connection.smtp.send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server closed a pooled session behind our back; retry once on a fresh one.
+                    connection = await self._connect()
+                    await connection.smtp.send_message(message)
+            except Exception as e:
+                logging.error(f"Failed to send email: {str(e)}")
+                if connection is not None:
+                    connection.smtp.close()
+                raise
+            connection.messages_sent += 1
+            await self._release(connection)
+        logging.info(f"Email sent to {recipient}")
+
+    async def close(self):
+        """Close all idle sessions."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._discard(connection)
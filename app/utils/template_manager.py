@@ -1,11 +1,46 @@
+import html
+import re
 import markdown2
 from pathlib import Path
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+from settings.config import settings
+
+# Placeholders are swapped for plain alphanumeric markers while the markdown is converted,
+# so markdown2 leaves them intact and they can be located again in the generated HTML.
+_SLOT_MARKER = "zqslot{}qz"
+_SLOT_PATTERN = re.compile(r"zqslot(\d+)qz")
+
+
+class CompiledTemplate:
+    """
+    A template converted to styled HTML once, kept as alternating literal HTML chunks and
+    placeholder names so rendering is only string joining.
+    """
+
+    def __init__(self, parts: List[str], fields: List[str], mtimes: Tuple[float, ...]):
+        self.parts = parts
+        self.fields = fields
+        self.mtimes = mtimes
+
+    def render(self, context: dict) -> str:
+        chunks = [self.parts[0]]
+        for field, literal in zip(self.fields, self.parts[1:]):
+            chunks.append(html.escape(str(context[field]), quote=True))
+            chunks.append(literal)
+        return "".join(chunks)
+
 
 class TemplateManager:
-    def __init__(self):
+    # Compiled templates are shared by every instance, keyed by template file path.
+    _compiled: Dict[Path, CompiledTemplate] = {}
+
+    def __init__(self, auto_reload: Optional[bool] = None):
         # Dynamically determine the root path of the project
         self.root_dir = Path(__file__).resolve().parent.parent.parent  # Adjust this depending on the structure
         self.templates_dir = self.root_dir / 'email_templates'
+        # In development, templates are recompiled when a file's mtime changes.
+        self.auto_reload = settings.template_auto_reload if auto_reload is None else auto_reload
 
     def _read_template(self, filename: str) -> str:
         """Private method to read template content."""
@@ -32,15 +67,53 @@ class TemplateManager:
                 styled_html = styled_html.replace(f'<{tag}>', f'<{tag} style="{style}">')
         return styled_html
 
-    def render_template(self, template_name: str, **context) -> str:
-        """Render a markdown template with given context, applying advanced email styles."""
+    def _template_files(self, template_name: str) -> List[Path]:
+        return [self.templates_dir / name for name in ('header.md', f'{template_name}.md', 'footer.md')]
+
+    def _compile(self, template_name: str) -> CompiledTemplate:
+        """Convert header, template and footer to styled HTML with placeholder slots."""
+        mtimes = tuple(path.stat().st_mtime for path in self._template_files(template_name))
         header = self._read_template('header.md')
         footer = self._read_template('footer.md')
 
-        # Read main template and format it with provided context
-        main_template = self._read_template(f'{template_name}.md')
-        main_content = main_template.format(**context)
+        # Rebuild the main template with a numbered marker in place of each {placeholder}
+        fields = []
+        main_content = []
+        for literal, field, _, _ in Formatter().parse(self._read_template(f'{template_name}.md')):
+            main_content.append(literal)
+            if field is not None:
+                main_content.append(_SLOT_MARKER.format(len(fields)))
+                fields.append(field)
+
+        full_markdown = f"{header}\n{''.join(main_content)}\n{footer}"
+        styled_html = self._apply_email_styles(markdown2.markdown(full_markdown))
+        # re.split with a capture group alternates literal HTML and marker indexes
+        pieces = _SLOT_PATTERN.split(styled_html)
+        return CompiledTemplate(
+            parts=pieces[0::2],
+            fields=[fields[int(index)] for index in pieces[1::2]],
+            mtimes=mtimes,
+        )
 
-        full_markdown = f"{header}\n{main_content}\n{footer}"
-        html_content = markdown2.markdown(full_markdown)
-        return self._apply_email_styles(html_content)
+    def get_template(self, template_name: str) -> CompiledTemplate:
+        """Return the compiled template, compiling it on first use (or when changed, with auto_reload)."""
+        key = self.templates_dir / f'{template_name}.md'
+        compiled = self._compiled.get(key)
+        if compiled is not None and self.auto_reload:
+            mtimes = tuple(path.stat().st_mtime for path in self._template_files(template_name))
+            if mtimes != compiled.mtimes:
+                compiled = None
+        if compiled is None:
+            compiled = self._compile(template_name)
+            self._compiled[key] = compiled
+        return compiled
+
+    def precompile(self):
+        """Compile every template in the templates directory ahead of the first email."""
+        for path in self.templates_dir.glob('*.md'):
+            if path.name not in ('header.md', 'footer.md'):
+                self.get_template(path.stem)
+
+    def render_template(self, template_name: str, **context) -> str:
+        """Render a template with given context; values are HTML-escaped into the precompiled markup."""
+        return self.get_template(template_name).render(context)
@@ -0,0 +1,55 @@
+from builtins import float, int, len
+from collections import OrderedDict
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Small in-process cache whose entries expire after a fixed time-to-live.
+
+    When `maxsize` is set the cache also evicts its least recently used entry once full;
+    `evictions` counts entries dropped that way before they expired.
+    Instances are meant to be used from the event loop thread only, so no locking is done.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value; `ttl_seconds` overrides the cache-wide TTL for this entry."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        now = self._clock()
+        self._entries[key] = (value, now + ttl)
+        self._entries.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._entries) > self.maxsize:
+                _, (_, expires_at) = self._entries.popitem(last=False)
+                if expires_at > now:
+                    self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
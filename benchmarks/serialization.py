@@ -0,0 +1,104 @@
+"""
+Serialization throughput of user responses: FastAPI's default path against the trusted path.
+
+The default path is what the user routes used to do: validate every row into a
+`UserResponse`, then let FastAPI validate the result against `response_model` again, run it
+through `jsonable_encoder` and encode it with the stdlib `json` module. The trusted path
+builds the models with `model_construct` and renders them once with `ModelResponse`.
+
+No database is needed; rows are transient `User` objects. Run from the repository root:
+
+    python -m benchmarks.serialization [--repeat SECONDS]
+"""
+
+from builtins import float, int, len, max, print, range
+import argparse
+import asyncio
+import time
+import uuid
+import warnings
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from starlette.responses import JSONResponse
+
+from app.models.user_model import User, UserRole
+from app.routers import user_routes
+from app.routers.user_routes import _user_response
+from app.schemas.link_schema import LinkMode
+from app.schemas.user_schemas import UserListResponse, UserResponse
+from app.utils.json_response import ModelResponse
+from app.utils.link_generation import create_user_links
+
+SIZES = (1, 100, 1000)
+
+
+def make_request() -> Request:
+    app = FastAPI()
+    app.include_router(user_routes.router)
+    scope = {
+        "type": "http", "app": app, "method": "GET", "scheme": "http", "server": ("testserver", 80),
+        "root_path": "", "path": "/users/", "query_string": b"", "headers": [],
+    }
+    return Request(scope)
+
+
+def make_users(count: int):
+    now = datetime.now(timezone.utc)
+    return [
+        User(
+            id=uuid.uuid4(), nickname=f"user_{i}", email=f"user{i}@example.com", first_name="John",
+            last_name="Doe", bio="Experienced software developer specializing in web applications.",
+            profile_picture_url="https://example.com/profiles/john.jpg",
+            linkedin_profile_url="https://linkedin.com/in/johndoe", github_profile_url="https://github.com/johndoe",
+            role=UserRole.AUTHENTICATED, is_professional=False, created_at=now, updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+async def default_path(users, request: Request, field) -> bytes:
+    items = [UserResponse.model_validate(user) for user in users]
+    for item in items:
+        item.links = create_user_links(item.id, request)
+    content = UserListResponse(items=items, total=len(items), size=len(items), links=[])
+    body = await serialize_response(field=field, response_content=content)
+    return JSONResponse(body).body
+
+
+async def trusted_path(users, request: Request, field) -> bytes:
+    items = [_user_response(user, request, LinkMode.FULL) for user in users]
+    content = UserListResponse.model_construct(items=items, total=len(items), size=len(items), links=[])
+    return ModelResponse(content).body
+
+
+async def measure(path, users, request, field, seconds: float):
+    body = await path(users, request, field)
+    runs = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        await path(users, request, field)
+        runs += 1
+    elapsed = time.perf_counter() - start
+    return max(runs, 1) / elapsed, len(body)
+
+
+async def main(seconds: float):
+    request = make_request()
+    field = create_response_field(name="response", type_=UserListResponse)
+    print(f"{'users':>6} {'path':>8} {'responses/s':>12} {'users/s':>12} {'MB/s':>8}")
+    for size in SIZES:
+        users = make_users(size)
+        for name, path in (("default", default_path), ("trusted", trusted_path)):
+            rate, body_size = await measure(path, users, request, field, seconds)
+            print(f"{size:>6} {name:>8} {rate:>12.1f} {rate * size:>12.0f} {rate * body_size / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    # The default path warns about the unvalidated link URLs on every dump
+    warnings.filterwarnings("ignore", message="Pydantic serializer warnings")
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=float, default=2.0, help="Seconds to run each case")
+    asyncio.run(main(parser.parse_args().repeat))
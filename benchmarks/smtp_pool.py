@@ -0,0 +1,39 @@
+"""
+Delivery throughput of the pooled SMTP client against the in-process stand-in server.
+
+Messages are sent concurrently, so the pool's sessions overlap their round trips. No mail
+server or network access is needed. Run from the repository root:
+
+    python -m benchmarks.smtp_pool [--messages COUNT] [--pool-size SIZE]
+"""
+
+from builtins import int, print, range
+import argparse
+import asyncio
+import time
+
+from app.utils.smtp_connection import SMTPClient
+from tests.stub_smtp_server import StubSMTPServer
+
+
+async def main(messages: int, pool_size: int):
+    server = StubSMTPServer()
+    await server.start()
+    client = SMTPClient(server="127.0.0.1", port=server.port, username="user@example.com", password="secret",
+                        use_tls=False, pool_size=pool_size)
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(client.send_email("Subject", "<p>Hello</p>", "user@example.com") for _ in range(messages)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+        await server.stop()
+    print(f"Sent {messages} emails over {server.connections} sessions in {elapsed:.2f}s ({messages / elapsed:.0f} msg/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500, help="Number of emails to send")
+    parser.add_argument("--pool-size", type=int, default=2, help="Concurrent SMTP sessions")
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.pool_size))
@@ -6,6 +6,7 @@ This Python test file utilizes pytest to manage database states and HTTP clients
 
 Fixtures:
 - `async_client`: Manages an asynchronous HTTP client for testing interactions with the FastAPI application.
+- `smtp_server` / `smtp_client`: Run a local stand-in SMTP server and a pooled client connected to it.
 - `db_session`: Handles database transactions to ensure a clean database state for each test.
 - User fixtures (`user`, `locked_user`, `verified_user`, etc.): Set up various user states to test different behaviors under diverse conditions.
 - `token`: Generates an authentication token for testing secured endpoints.
@@ -14,13 +15,15 @@ Fixtures:
 """
 
 # Standard library imports
-from builtins import range
+from builtins import range, str
 from datetime import datetime
 from unittest.mock import patch
 from uuid import uuid4
 
 # Third-party imports
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
@@ -29,19 +32,24 @@ from faker import Faker
 
 # Application-specific imports
 from app.main import app
-from app.database import Base, Database
+from app.middleware import rate_limiter
+from app.database import Base, Database, instrument_round_trips
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_read_db, get_read_session_factory, get_settings
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
-from app.services.jwt_service import create_access_token
+from app.services.jwt_service import create_access_token, reload_keyset
+from app.services.user_service import UserService
+from app.utils.smtp_connection import SMTPClient
+from tests.stub_smtp_server import StubSMTPServer
 
 fake = Faker()
 
 settings = get_settings()
 TEST_DATABASE_URL = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
 engine = create_async_engine(TEST_DATABASE_URL, echo=settings.debug)
+instrument_round_trips(engine)
 AsyncTestingSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 AsyncSessionScoped = scoped_session(AsyncTestingSessionLocal)
 
@@ -53,17 +61,45 @@ def email_service():
     email_service = EmailService(template_manager=template_manager)
     return email_service
 
+# Local stand-in for the mail server, so email delivery can be exercised offline.
+@pytest.fixture
+async def smtp_server():
+    server = StubSMTPServer()
+    await server.start()
+    yield server
+    await server.stop()
+
+@pytest.fixture
+async def smtp_client(smtp_server):
+    client = SMTPClient(server="127.0.0.1", port=smtp_server.port, username="user@example.com", password="secret", use_tls=False)
+    yield client
+    await client.close()
+
 
 # this is what creates the http client for your api tests
 @pytest.fixture(scope="function")
 async def async_client(db_session):
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[get_read_db] = lambda: db_session
+        app.dependency_overrides[get_read_session_factory] = lambda: AsyncTestingSessionLocal
         try:
             yield client
         finally:
             app.dependency_overrides.clear()
 
+# Tokens are signed with asymmetric keys, as in production
+@pytest.fixture(scope="session", autouse=True)
+def jwt_keys_dir(tmp_path_factory):
+    keys_dir = tmp_path_factory.mktemp("jwt_keys")
+    (keys_dir / "signing.pem").write_bytes(Ed25519PrivateKey.generate().private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "jwt_keys_dir", str(keys_dir))
+        reload_keyset()
+        yield keys_dir
+
 @pytest.fixture(scope="session", autouse=True)
 def initialize_database():
     try:
@@ -76,6 +112,10 @@ def initialize_database():
 async def setup_database():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Cached users would outlive the tables they came from
+    UserService._user_cache.clear()
+    # Every test starts with full rate limit budgets
+    rate_limiter.clear()
     yield
     async with engine.begin() as conn:
         # you can comment out this line during development if you are debugging a single test
@@ -210,6 +250,18 @@ async def manager_user(db_session: AsyncSession):
     await db_session.commit()
     return user
 
+@pytest.fixture
+def admin_token(admin_user):
+    return create_access_token(data={"sub": admin_user.email, "role": admin_user.role.name})
+
+@pytest.fixture
+def manager_token(manager_user):
+    return create_access_token(data={"sub": manager_user.email, "role": manager_user.role.name})
+
+@pytest.fixture
+def user_token(user):
+    return create_access_token(data={"sub": user.email, "role": user.role.name})
+
 
 # Fixtures for common test data
 @pytest.fixture
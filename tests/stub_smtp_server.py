@@ -0,0 +1,83 @@
+"""
+A minimal in-process SMTP server used as a stand-in for the real mail server in tests.
+
+It speaks just enough ESMTP (EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT) for
+`SMTPClient` to connect, authenticate and deliver, and it records every message and
+connection so tests can measure session reuse and throughput without network access.
+"""
+
+from builtins import bytes, int, len, list, str
+import asyncio
+from typing import List, Optional
+
+
+class StubSMTPServer:
+    def __init__(self):
+        self.messages: List[bytes] = []
+        self.connections = 0
+        self._writers: List[asyncio.StreamWriter] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port: Optional[int] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self):
+        """Close every open session, as a server does with idle clients."""
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._writers.append(writer)
+
+        async def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        try:
+            await reply("220 stub ESMTP ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode().strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    writer.write(b"250-stub\r\n250-AUTH PLAIN\r\n250-PIPELINING\r\n250 8BITMIME\r\n")
+                    await writer.drain()
+                elif verb == "AUTH":
+                    if len(command.split()) < 3:
+                        await reply("334 ")
+                        await reader.readline()
+                    await reply("235 2.7.0 Authentication successful")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while True:
+                        data_line = await reader.readline()
+                        if data_line in (b".\r\n", b".\n", b""):
+                            break
+                        data.append(data_line)
+                    self.messages.append(b"".join(data))
+                    await reply("250 2.0.0 Ok: queued")
+                elif verb == "QUIT":
+                    await reply("221 2.0.0 Bye")
+                    break
+                elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 2.0.0 Ok")
+                else:
+                    await reply("502 5.5.2 Command not recognized")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if writer in self._writers:
+                self._writers.remove(writer)
+            writer.close()
@@ -1,10 +1,12 @@
 from builtins import str
 import pytest
 from httpx import AsyncClient
+from unittest.mock import patch
+from app.database import Database
 from app.main import app
 from app.models.user_model import User
 from app.utils.nickname_gen import generate_nickname
-from app.utils.security import hash_password
+from app.utils.security import PasswordHashingBusyError, hash_password
 from app.services.jwt_service import decode_token  # Import your FastAPI app
 
 # Example of a test function using the async_client fixture
@@ -51,6 +53,12 @@ async def test_update_user_email_access_allowed(async_client, admin_user, admin_
     assert response.status_code == 200
     assert response.json()["email"] == updated_data["email"]
 
+@pytest.mark.asyncio
+async def test_update_user_email_taken(async_client, admin_user, verified_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.put(f"/users/{admin_user.id}", json={"email": verified_user.email}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already exists"
 
 @pytest.mark.asyncio
 async def test_delete_user(async_client, admin_user, admin_token):
@@ -189,3 +197,247 @@ async def test_list_users_unauthorized(async_client, user_token):
         headers={"Authorization": f"Bearer {user_token}"}
     )
     assert response.status_code == 403  # Forbidden, as expected for regular user
+
+@pytest.mark.asyncio
+async def test_list_users_cursor_pagination(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?limit=20", headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()
+    next_link = next(link["href"] for link in first_page["links"] if link["rel"] == "next")
+    response = await async_client.get(next_link, headers=headers)
+    assert response.status_code == 200
+    second_page = response.json()
+    first_ids = {item["id"] for item in first_page["items"]}
+    assert len(second_page["items"]) == 20
+    assert not first_ids & {item["id"] for item in second_page["items"]}
+
+@pytest.mark.asyncio
+async def test_list_users_invalid_cursor(async_client, admin_token):
+    response = await async_client.get("/users/?cursor=not-a-cursor", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_users_count_mode(async_client, admin_token):
+    response = await async_client.get("/users/?count=cached", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert response.json()["total_estimated"] is False
+
+@pytest.mark.asyncio
+async def test_metrics_requires_admin(async_client, admin_token, manager_token):
+    response = await async_client.get("/metrics/", headers={"Authorization": f"Bearer {manager_token}"})
+    assert response.status_code == 403
+    response = await async_client.get("/metrics/", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert "db_pool" in response.json()
+    assert "token_cache" in response.json()
+    assert response.json()["db_round_trips"]["requests"] >= 1
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected(async_client, admin_token):
+    from app.services.jwt_service import revoke_token, token_cache
+    response = await async_client.get("/metrics/", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    revoke_token(admin_token)
+    try:
+        response = await async_client.get("/metrics/", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 401
+    finally:
+        # Tokens minted in the same second are identical; do not leak the revocation
+        token_cache.clear()
+
+@pytest.mark.asyncio
+async def test_jwks_verifies_tokens_locally(async_client, admin_token):
+    import jwt
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    keys = {jwk["kid"]: jwk for jwk in response.json()["keys"]}
+    header = jwt.get_unverified_header(admin_token)
+    public_key = jwt.PyJWK(keys[header["kid"]]).key
+    assert jwt.decode(admin_token, public_key, algorithms=[header["alg"]])["role"] == "ADMIN"
+
+@pytest.mark.asyncio
+async def test_refresh_token_grant(async_client, verified_user):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    refresh_token = response.json()["refresh_token"]
+
+    with patch("app.services.user_service.verify_password_async") as verify:
+        response = await async_client.post("/refresh/", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    assert not verify.called
+    data = response.json()
+    assert decode_token(data["access_token"])["sub"] == verified_user.email
+    assert data["refresh_token"] != refresh_token
+
+    response = await async_client.post("/refresh/", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_and_refresh_tokens(async_client, verified_user):
+    from app.services.jwt_service import token_cache
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    tokens = response.json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    try:
+        response = await async_client.post("/logout/", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+        assert response.status_code == 204
+        response = await async_client.post("/logout/", headers=headers)
+        assert response.status_code == 401
+    finally:
+        # Tokens minted in the same second are identical; do not leak the revocation
+        token_cache.clear()
+    response = await async_client.post("/refresh/", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_import_users_csv(async_client, admin_token, manager_token):
+    body = "email,password,first_name\ncsv1@example.com,Secret*1234,Ann\nbroken,Secret*1234,Bob\n"
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"}
+    response = await async_client.post("/users/import/", content=body, headers=headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 1
+    assert report["errors"][0]["row"] == 2
+
+    headers["Authorization"] = f"Bearer {manager_token}"
+    response = await async_client.post("/users/import/", content=body, headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_import_users_rejects_unknown_format(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "application/xml"}
+    response = await async_client.post("/users/import/", content="<users/>", headers=headers)
+    assert response.status_code == 415
+
+@pytest.mark.asyncio
+async def test_export_users_ndjson_and_csv(async_client, admin_token, verified_user):
+    import json
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/export/?columns=email,role&email_verified=true", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {"email": verified_user.email, "role": verified_user.role.name} in rows
+    assert all(set(row) == {"email", "role"} for row in rows)
+
+    response = await async_client.get("/users/export/?format=csv&columns=email,nickname", headers=headers)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "email,nickname"
+    assert f"{verified_user.email},{verified_user.nickname}" in lines
+
+@pytest.mark.asyncio
+async def test_export_users_rejects_secret_columns(async_client, admin_token):
+    response = await async_client.get("/users/export/?columns=email,hashed_password", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_get_user_conditional(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get(f"/users/{admin_user.id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = await async_client.get(f"/users/{admin_user.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # Another links mode is another representation with a tag of its own
+    response = await async_client.get(f"/users/{admin_user.id}?links=none", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_update_user_if_match(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    etag = (await async_client.get(f"/users/{admin_user.id}?links=minimal", headers=headers)).headers["etag"]
+
+    # A tag of any links mode of the current version matches
+    response = await async_client.put(f"/users/{admin_user.id}", json={"first_name": "First"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+
+    # The old tag is stale now
+    response = await async_client.put(f"/users/{admin_user.id}", json={"first_name": "Second"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+
+    response = await async_client.get(f"/users/{admin_user.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "First"
+    assert response.headers["etag"] == new_etag
+
+@pytest.mark.asyncio
+async def test_list_users_conditional(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?limit=5", headers=headers)
+    etag = response.headers["etag"]
+    response = await async_client.get("/users/?limit=5", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    response = await async_client.get("/users/?limit=6", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_user_links_modes(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    user = (await async_client.get(f"/users/{admin_user.id}", headers=headers)).json()
+    assert {link["rel"]: link["href"] for link in user["links"]} == {
+        "self": f"http://testserver/users/{admin_user.id}",
+        "update": f"http://testserver/users/{admin_user.id}",
+        "delete": f"http://testserver/users/{admin_user.id}",
+    }
+    user = (await async_client.get(f"/users/{admin_user.id}?links=minimal", headers=headers)).json()
+    assert [link["rel"] for link in user["links"]] == ["self"]
+
+    page = (await async_client.get("/users/?links=full", headers=headers)).json()
+    assert all(len(item["links"]) == 3 for item in page["items"])
+    page = (await async_client.get("/users/?links=none", headers=headers)).json()
+    assert page["links"] == []
+    assert all(item["links"] == [] for item in page["items"])
+    response = await async_client.get("/users/?links=all", headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_user_responses_are_built_from_the_row(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.put(f"/users/{admin_user.id}", json={"bio": "Updated"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body["role"] == "ADMIN"
+    assert body["bio"] == "Updated"
+    assert body["email"] == admin_user.email
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_account(async_client, verified_user):
+    from app.dependencies import get_settings
+    form_data = {"username": verified_user.email, "password": "wrong"}
+    for _ in range(get_settings().rate_limit_auth_account_per_minute):
+        response = await async_client.post("/login/", data=form_data, headers={"Content-Type": "application/x-www-form-urlencoded"})
+        assert response.status_code in (400, 401)
+    response = await async_client.post("/login/", data=form_data, headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+
+# Test that errors raised by routes pass through the real session dependency unchanged
+@pytest.mark.asyncio
+async def test_route_errors_pass_through_get_db():
+    try:
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            with patch("app.services.user_service.hash_password_async", side_effect=PasswordHashingBusyError("saturated")):
+                response = await client.post("/register/", json={"email": "busy@example.com", "password": "sS#fdasrongPassword123!"})
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+
+            response = await client.post("/login/", data={"username": "nobody@example.com", "password": "Wrong123!"})
+            assert response.status_code == 401
+            assert response.json()["detail"] == "Incorrect email or password."
+    finally:
+        # The application's engine pooled connections on this test's event loop
+        await Database._engine.dispose()
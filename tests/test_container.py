@@ -0,0 +1,36 @@
+from builtins import str
+import pytest
+from pydantic import ValidationError
+
+from app.container import container
+from app.dependencies import get_email_service, get_settings, get_smtp_client
+from app.schemas.pagination_schema import CountMode
+from settings.config import Settings
+
+def test_dependencies_return_shared_instances():
+    assert get_settings() is get_settings()
+    assert get_email_service() is get_email_service()
+    assert get_email_service().smtp_client is get_smtp_client()
+
+@pytest.mark.asyncio
+async def test_reload_refreshes_settings_in_place(monkeypatch):
+    settings = get_settings()
+    email_service = get_email_service()
+    original = settings.max_login_attempts
+    monkeypatch.setenv("MAX_LOGIN_ATTEMPTS", str(original + 4))
+    # A reload reads the environment, where the test signing keys are not configured
+    monkeypatch.setenv("JWT_KEYS_DIR", settings.jwt_keys_dir)
+    try:
+        await container.reload()
+        assert get_settings() is settings
+        assert settings.max_login_attempts == original + 4
+        assert get_email_service() is not email_service
+    finally:
+        monkeypatch.delenv("MAX_LOGIN_ATTEMPTS")
+        await container.reload()
+    assert settings.max_login_attempts == original
+
+def test_count_mode_setting_is_validated_at_load():
+    assert Settings(user_count_default_mode="estimated").user_count_default_mode is CountMode.ESTIMATED
+    with pytest.raises(ValidationError):
+        Settings(user_count_default_mode="estimate")
@@ -0,0 +1,115 @@
+from typing import Optional
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from starlette.requests import Request
+
+from app.database import Database
+from app import dependencies
+from app.dependencies import get_db, get_read_db, pin_reads_to_primary
+from app.services.jwt_service import create_access_token
+
+
+def make_request(method: str, subject: Optional[str] = "a@example.com") -> Request:
+    headers = []
+    if subject is not None:
+        token = create_access_token(data={"sub": subject, "role": "AUTHENTICATED"})
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/users/",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+    }
+    return Request(scope)
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    replica_factory = MagicMock(name="replica_factory")
+    monkeypatch.setattr(Database, "_replica_engines", [MagicMock()])
+    monkeypatch.setattr(Database, "_replica_session_factories", [replica_factory])
+    dependencies._recent_writers.clear()
+    yield replica_factory
+    dependencies._recent_writers.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_uses_replica(replica):
+    session_gen = get_read_db(make_request("GET"))
+    await session_gen.__anext__()
+    assert replica.called
+    await session_gen.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_pins_recent_writer_to_primary(replica):
+    write_gen = get_db(make_request("POST"))
+    await write_gen.__anext__()
+    await write_gen.aclose()
+
+    read_gen = get_read_db(make_request("GET"))
+    await read_gen.__anext__()
+    assert not replica.called
+    await read_gen.aclose()
+
+    other_client = get_read_db(make_request("GET", subject="b@example.com"))
+    await other_client.__anext__()
+    assert replica.called
+    await other_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_login_pins_the_subject_and_anonymous_writes_pin_nothing(replica):
+    write_gen = get_db(make_request("POST", subject=None))
+    await write_gen.__anext__()
+    await write_gen.aclose()
+    anonymous = get_read_db(make_request("GET", subject=None))
+    await anonymous.__anext__()
+    assert replica.call_count == 1
+    await anonymous.aclose()
+
+    # A login has no token yet; the tokens it issues share the subject it pins
+    pin_reads_to_primary("c@example.com")
+    read_gen = get_read_db(make_request("GET", subject="c@example.com"))
+    await read_gen.__anext__()
+    assert replica.call_count == 1
+    await read_gen.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_db_commits_once_when_the_route_returns(monkeypatch):
+    session = MagicMock()
+    session.in_transaction.return_value = True
+    session.commit = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(Database, "get_session_factory", classmethod(lambda cls: factory))
+
+    session_gen = get_db(make_request("POST"))
+    assert await session_gen.__anext__() is session
+    session.commit.assert_not_awaited()
+    with pytest.raises(StopAsyncIteration):
+        await session_gen.__anext__()
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_db_rolls_back_and_reraises_route_errors(monkeypatch):
+    session = MagicMock()
+    session.in_transaction.return_value = True
+    session.commit = AsyncMock()
+    session.rollback = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(Database, "get_session_factory", classmethod(lambda cls: factory))
+
+    session_gen = get_db(make_request("POST"))
+    await session_gen.__anext__()
+    with pytest.raises(LookupError):
+        await session_gen.athrow(LookupError("raised by the route"))
+    session.rollback.assert_awaited_once()
+    session.commit.assert_not_awaited()
@@ -0,0 +1,76 @@
+from builtins import ConnectionError, ValueError, isinstance
+import pytest
+from app.utils.entity_cache import EntityCache, LocalCacheBackend, create_cache_backend
+
+pytestmark = pytest.mark.asyncio
+
+SNAPSHOT = {"id": "7f1c", "email": "john@example.com", "nickname": "jolly_fox_1"}
+
+async def test_lookup_by_id_and_index_fields():
+    cache = EntityCache("user", ttl_seconds=60, maxsize=10)
+    await cache.put(SNAPSHOT, index_fields=("email", "nickname"))
+    assert await cache.get("id", "7f1c") == SNAPSHOT
+    assert await cache.get("email", "john@example.com") == SNAPSHOT
+    assert await cache.get("email", "other@example.com") is None
+    assert cache.stats()["local_hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+async def test_stale_index_entry_misses():
+    cache = EntityCache("user", ttl_seconds=60, maxsize=10)
+    await cache.put(SNAPSHOT, index_fields=("email",))
+    await cache.put({**SNAPSHOT, "email": "new@example.com"}, index_fields=("email",))
+    assert await cache.get("email", "john@example.com") is None
+    assert (await cache.get("email", "new@example.com"))["email"] == "new@example.com"
+
+async def test_invalidation_reaches_other_workers_through_shared_store():
+    shared = LocalCacheBackend()
+    worker_a = EntityCache("user", ttl_seconds=60, maxsize=10, shared=shared)
+    worker_b = EntityCache("user", ttl_seconds=60, maxsize=10, shared=shared)
+    await worker_a.put(SNAPSHOT, index_fields=("email",))
+    assert await worker_b.get("email", "john@example.com") == SNAPSHOT
+    assert worker_b.stats()["shared_hits"] == 1
+
+    await worker_a.invalidate("7f1c")
+    worker_b.clear()
+    assert await worker_b.get("id", "7f1c") is None
+    assert worker_b.stats()["size"] == 0
+
+async def test_fill_started_before_an_invalidation_is_dropped():
+    cache = EntityCache("user", ttl_seconds=60, maxsize=10)
+    generation = cache.fill_generation()
+    await cache.invalidate("7f1c")
+    await cache.put(SNAPSHOT, generation=generation)
+    assert await cache.get("id", "7f1c") is None
+    assert cache.stats()["stale_fills"] == 1
+
+    await cache.put(SNAPSHOT, generation=cache.fill_generation())
+    assert await cache.get("id", "7f1c") == SNAPSHOT
+
+async def test_invalidation_keeps_late_fills_of_other_workers_out_of_shared_store():
+    shared = LocalCacheBackend()
+    worker_a = EntityCache("user", ttl_seconds=60, maxsize=10, shared=shared)
+    worker_b = EntityCache("user", ttl_seconds=60, maxsize=10, shared=shared)
+    generation = worker_b.fill_generation()
+    await worker_a.invalidate("7f1c")
+    await worker_b.put(SNAPSHOT, generation=generation)
+    assert await worker_a.get("id", "7f1c") is None
+
+async def test_shared_store_failures_degrade_to_misses():
+    class BrokenBackend:
+        async def get(self, key):
+            raise ConnectionError("down")
+        async def set(self, key, value, ttl_seconds, only_if_absent=False):
+            raise ConnectionError("down")
+
+    cache = EntityCache("user", ttl_seconds=60, maxsize=10, shared=BrokenBackend())
+    await cache.put(SNAPSHOT)
+    cache.clear()
+    assert await cache.get("id", "7f1c") is None
+    await cache.invalidate("7f1c")
+    assert cache.stats()["shared_errors"] == 2
+
+def test_create_cache_backend():
+    assert create_cache_backend("") is None
+    assert isinstance(create_cache_backend("local://"), LocalCacheBackend)
+    with pytest.raises(ValueError):
+        create_cache_backend("memcached://localhost")
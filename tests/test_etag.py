@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+from app.utils.etag import list_etag, match, none_match, user_etag
+
+def test_user_etag_changes_with_updated_at():
+    user_id = uuid4()
+    first = user_etag(user_id, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert first.startswith('"') and first.endswith('"')
+    assert first == user_etag(user_id, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert first != user_etag(user_id, datetime(2024, 1, 1, 0, 0, 0, 1, tzinfo=timezone.utc))
+
+def test_user_etag_covers_representation():
+    user_id, updated_at = uuid4(), datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert user_etag(user_id, updated_at, "full", "http://a/") != user_etag(user_id, updated_at, "none", "http://a/")
+    assert user_etag(user_id, updated_at, "full", "http://a/") != user_etag(user_id, updated_at, "full", "http://b/")
+
+def test_list_etag_covers_metadata():
+    items = [(uuid4(), datetime(2024, 1, 1, tzinfo=timezone.utc))]
+    assert list_etag(items, 1, "limit=10") != list_etag(items, 2, "limit=10")
+
+def test_none_match_uses_weak_comparison():
+    assert none_match('"a", W/"b"', '"b"')
+    assert none_match("*", '"b"')
+    assert not none_match(None, '"b"')
+    assert not none_match('"a"', '"b"')
+
+def test_match_uses_strong_comparison():
+    assert match(None, '"b"')
+    assert match('"a", "b"', '"b"')
+    assert not match('W/"b"', '"b"')
@@ -0,0 +1,48 @@
+from builtins import bytes, len, list, range
+import pytest
+from app.utils.import_stream import MAX_LINE_CHARS, ImportRow, batched, iter_csv_rows, iter_lines, iter_ndjson_rows
+
+pytestmark = pytest.mark.asyncio
+
+async def chunked(data: bytes, size: int = 3):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+async def test_iter_lines_handles_split_chunks_and_multibyte():
+    data = "first\r\nsecónd\nlast".encode("utf-8")
+    assert await collect(iter_lines(chunked(data, 2))) == ["first", "secónd", "last"]
+
+async def test_iter_lines_drops_overlong_lines():
+    data = b"short\n" + b"x" * (MAX_LINE_CHARS + 1) + b"\nafter\n" + b"y" * (MAX_LINE_CHARS * 2)
+    assert await collect(iter_lines(chunked(data, 4096))) == ["short", None, "after", None]
+
+async def test_ndjson_rows_report_bad_lines():
+    data = b'{"email": "a@example.com"}\n\nnot json\n[1]\n'
+    rows = await collect(iter_ndjson_rows(chunked(data)))
+    assert rows[0] == ImportRow(1, data={"email": "a@example.com"})
+    assert rows[1].row == 3 and rows[1].error.startswith("Invalid JSON")
+    assert rows[2] == ImportRow(4, error="Expected a JSON object")
+
+async def test_csv_rows_with_header_quotes_and_empty_values():
+    data = b'email,password,bio\na@example.com,Secret*123,\nb@example.com,Secret*123,"two\nlines, quoted"\nc@example.com\n'
+    rows = await collect(iter_csv_rows(chunked(data, 5)))
+    assert rows[0] == ImportRow(1, data={"email": "a@example.com", "password": "Secret*123"})
+    assert rows[1].data["bio"] == "two\nlines, quoted"
+    assert rows[2] == ImportRow(3, error="Expected 3 columns, got 1")
+
+async def test_csv_rows_report_overlong_lines():
+    data = b"email,password\n" + b"a" * (MAX_LINE_CHARS + 1) + b"\nb@example.com,Secret*123\n"
+    rows = await collect(iter_csv_rows(chunked(data, 4096)))
+    assert rows == [
+        ImportRow(1, error="Record too long or unterminated quoted value"),
+        ImportRow(2, data={"email": "b@example.com", "password": "Secret*123"}),
+    ]
+
+async def test_batched():
+    async def rows():
+        for row in range(5):
+            yield ImportRow(row)
+    assert [len(batch) for batch in await collect(batched(rows(), 2))] == [2, 2, 1]
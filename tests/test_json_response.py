@@ -0,0 +1,32 @@
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from app.models.user_model import UserRole
+from app.schemas.link_schema import Link
+from app.schemas.user_schemas import UserResponse
+from app.utils.json_response import FastJSONResponse, ModelResponse
+
+
+def test_fast_json_response_renders_compact_json():
+    response = FastJSONResponse({"name": "Zoë", "values": [1, 2.5, None]})
+    assert json.loads(response.body) == {"name": "Zoë", "values": [1, 2.5, None]}
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_model_response_serializes_constructed_model_without_validation():
+    user_id = uuid4()
+    model = UserResponse.model_construct(
+        id=user_id,
+        email="john.doe@example.com",
+        nickname="john_doe",
+        role=UserRole.ADMIN,
+        links=[Link.model_construct(rel="self", href=f"http://testserver/users/{user_id}", action="view", type="application/json")],
+    )
+    response = ModelResponse(model, status_code=201, headers={"ETag": '"abc"'})
+    body = json.loads(response.body)
+    assert response.status_code == 201
+    assert response.headers["etag"] == '"abc"'
+    assert body["id"] == str(user_id)
+    assert body["role"] == "ADMIN"
+    assert body["links"][0]["href"] == f"http://testserver/users/{user_id}"
@@ -0,0 +1,73 @@
+from builtins import len, str
+import os
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from app.utils.jwt_keys import KeySet, SigningKey
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_kid_is_stable_thumbprint():
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    assert SigningKey(private_key, 0).kid == SigningKey(private_key, 100).kid
+    assert SigningKey(private_key, 0).kid != SigningKey.generate("EdDSA", 0).kid
+
+
+@pytest.mark.parametrize("algorithm", ["EdDSA", "RS256"])
+def test_token_verifies_with_published_jwk(algorithm):
+    keyset = KeySet.generate(algorithm, grace_seconds=60)
+    key = keyset.signing_key()
+    token = jwt.encode({"sub": "john@example.com"}, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+    (jwk,) = keyset.jwks()["keys"]
+    assert jwk["kid"] == key.kid and jwk["alg"] == algorithm
+    assert "d" not in jwk
+    public_key = jwt.PyJWK(jwk).key
+    assert jwt.decode(token, public_key, algorithms=[algorithm])["sub"] == "john@example.com"
+
+
+def test_rotation_publishes_ahead_and_keeps_grace_period():
+    clock = FakeClock()
+    keyset = KeySet.generate("EdDSA", grace_seconds=600, clock=clock)
+    old = keyset.signing_key()
+    new = SigningKey.generate("EdDSA", activates_at=clock.now + 300)
+    keyset.rotate(new)
+
+    # Published before use, but the old key still signs
+    assert keyset.signing_key() is old
+    assert len(keyset.jwks()["keys"]) == 2
+
+    clock.now += 300
+    assert keyset.signing_key() is new
+    assert keyset.verification_key(old.kid) is old
+
+    clock.now += 600
+    assert keyset.verification_key(old.kid) is None
+    assert [jwk["kid"] for jwk in keyset.jwks()["keys"]] == [new.kid]
+
+
+def test_from_directory_orders_keys_by_mtime(tmp_path):
+    clock = FakeClock()
+    for name, mtime in (("b.pem", clock.now - 100), ("a.pem", clock.now - 1000)):
+        pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        (tmp_path / name).write_bytes(pem)
+        os.utime(tmp_path / name, (mtime, mtime))
+    keyset = KeySet.from_directory(str(tmp_path), grace_seconds=600, publish_seconds=300, clock=clock)
+    # b.pem appeared 100s ago and is still only published; a.pem keeps signing
+    assert keyset.signing_key() is keyset.keys[0]
+    clock.now += 200
+    assert keyset.signing_key() is keyset.keys[1]
+
+
+def test_from_directory_requires_keys(tmp_path):
+    with pytest.raises(ValueError):
+        KeySet.from_directory(str(tmp_path), grace_seconds=600, publish_seconds=300)
@@ -0,0 +1,90 @@
+from builtins import RuntimeError, range, str
+from datetime import timedelta
+import jwt
+import pytest
+from app.services.jwt_service import VerifiedTokenCache, _load_keyset, create_access_token, decode_token, get_keyset, reload_keyset, signing_algorithm, token_cache, verify_token
+from app.utils.jwt_keys import SigningKey
+from settings.config import settings
+
+
+def make_token(minutes=15, sub="john@example.com"):
+    return create_access_token(data={"sub": sub, "role": "ADMIN"}, expires_delta=timedelta(minutes=minutes))
+
+
+def test_cache_hit_after_put():
+    cache = VerifiedTokenCache(maxsize=10)
+    token = make_token()
+    assert cache.get(token) is None
+    cache.put(token, decode_token(token))
+    assert cache.get(token)["sub"] == "john@example.com"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_payload_is_not_cached():
+    cache = VerifiedTokenCache(maxsize=10)
+    token = make_token()
+    cache.put(token, {"sub": "john@example.com", "exp": 1})
+    assert cache.get(token) is None
+
+
+def test_revoked_token_stays_rejected():
+    cache = VerifiedTokenCache(maxsize=10)
+    token = make_token()
+    cache.put(token, decode_token(token))
+    cache.revoke(token)
+    assert cache.get(token) is None
+    assert cache.is_revoked(token)
+    cache.put(token, decode_token(token))
+    assert cache.get(token) is None
+
+
+def test_keyset_reload_forgets_verified_tokens():
+    token = make_token()
+    assert verify_token(token) is not None
+    reload_keyset()
+    assert token_cache.get(token) is None
+
+
+def test_cache_is_bounded():
+    cache = VerifiedTokenCache(maxsize=3)
+    tokens = [make_token(sub=f"user{i}@example.com") for i in range(5)]
+    for token in tokens:
+        cache.put(token, decode_token(token))
+    assert cache.stats()["size"] == 3
+    assert cache.get(tokens[0]) is None
+    assert cache.get(tokens[-1]) is not None
+
+
+def test_raw_token_is_not_stored():
+    cache = VerifiedTokenCache(maxsize=10)
+    token = make_token()
+    cache.put(token, decode_token(token))
+    assert token not in str(cache._verified._entries)
+
+
+def test_token_carries_kid_of_signing_key():
+    token = make_token()
+    assert jwt.get_unverified_header(token)["kid"] == get_keyset().signing_key().kid
+
+
+def test_token_with_unknown_kid_is_rejected():
+    other = SigningKey.generate("EdDSA", 0)
+    token = jwt.encode({"sub": "john@example.com", "exp": 4102444800}, other.private_key, algorithm="EdDSA", headers={"kid": other.kid})
+    assert decode_token(token) is None
+
+
+def test_shared_secret_token_is_rejected():
+    token = jwt.encode({"sub": "john@example.com", "exp": 4102444800}, "a_very_secret_key", algorithm="HS256", headers={"kid": get_keyset().signing_key().kid})
+    assert decode_token(token) is None
+
+
+def test_signing_algorithm_defaults_to_shared_secret_without_keys(monkeypatch):
+    monkeypatch.setattr(settings, "jwt_algorithm", "")
+    monkeypatch.setattr(settings, "jwt_keys_dir", "")
+    assert signing_algorithm() == "HS256"
+    monkeypatch.setattr(settings, "jwt_algorithm", "EdDSA")
+    with pytest.raises(RuntimeError):
+        _load_keyset()
+    monkeypatch.setattr(settings, "debug", True)
+    assert _load_keyset().signing_key().algorithm == "EdDSA"
@@ -6,7 +6,8 @@ from uuid import uuid4
 import pytest
 from fastapi import Request
 
-from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_pagination_links
+from app.schemas.link_schema import LinkMode
+from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_cursor_pagination_links, generate_pagination_links
 
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 
@@ -27,6 +28,9 @@ def mock_request():
     request = MagicMock(spec=Request)
     request.url_for = MagicMock(side_effect=lambda action, user_id: f"http://testserver/{action}/{user_id}")
     request.url = "http://testserver/users"
+    request.base_url = "http://testserver/"
+    request.app = MagicMock()
+    request.app.url_path_for = MagicMock(side_effect=lambda name, user_id: f"/{name}/{user_id}")
     return request
 
 def test_create_link():
@@ -41,6 +45,25 @@ def test_create_user_links(mock_request):
     assert normalize_url(str(links[1].href)) == f"http://testserver/update_user/{user_id}"
     assert normalize_url(str(links[2].href)) == f"http://testserver/delete_user/{user_id}"
 
+def test_create_user_links_resolves_routes_once(mock_request):
+    create_user_links(uuid4(), mock_request)
+    calls = mock_request.app.url_path_for.call_count
+    user_id = uuid4()
+    links = create_user_links(user_id, mock_request)
+    assert mock_request.app.url_path_for.call_count == calls
+    assert str(links[0].href) == f"http://testserver/get_user/{user_id}"
+
+def test_create_user_links_modes(mock_request):
+    user_id = uuid4()
+    assert create_user_links(user_id, mock_request, LinkMode.NONE) == []
+    minimal = create_user_links(user_id, mock_request, LinkMode.MINIMAL)
+    assert [link.rel for link in minimal] == ["self"]
+
+def test_pagination_links_modes(mock_request):
+    assert generate_pagination_links(mock_request, 0, 5, 50, LinkMode.NONE) == []
+    minimal = generate_cursor_pagination_links(mock_request, 5, None, "abc", None, LinkMode.MINIMAL)
+    assert {link.rel for link in minimal} == {"self", "next"}
+
 def test_generate_pagination_links(mock_request):
     skip = 10
     limit = 5
@@ -49,3 +72,10 @@ def test_generate_pagination_links(mock_request):
     assert len(links) >= 4
     expected_self_url = "http://testserver/users?limit=5&skip=10"
     assert normalize_url(str(links[0].href)) == normalize_url(expected_self_url), "Self link should match expected URL"
+
+def test_generate_cursor_pagination_links(mock_request):
+    links = generate_cursor_pagination_links(mock_request, 5, None, "abc", None)
+    rels = {link.rel: normalize_url(str(link.href)) for link in links}
+    assert rels["next"] == normalize_url("http://testserver/users?limit=5&cursor=abc")
+    assert "prev" not in rels
+
@@ -0,0 +1,87 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.database import Database
+from app.middleware import RoundTripMiddleware
+from tests.conftest import AsyncTestingSessionLocal
+
+
+async def two_reads(request):
+    async with AsyncTestingSessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+        await session.execute(text("SELECT 2"))
+    return PlainTextResponse("ok")
+
+
+@pytest.mark.asyncio
+async def test_round_trip_middleware_counts_each_request(monkeypatch):
+    monkeypatch.setattr(Database, "round_trip_stats", type(Database.round_trip_stats)())
+    app = RoundTripMiddleware(Starlette(routes=[Route("/", two_reads)]), header="X-DB-Round-Trips")
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get("/")
+    # BEGIN, two SELECTs and the ROLLBACK when the session closes
+    assert response.headers["x-db-round-trips"] == "4"
+    stats = Database.round_trip_stats.as_dict()
+    assert stats["requests"] == 1
+    assert stats["statements"] == 2
+    assert stats["max_per_request"] == 4
+
+
+async def echo_body(request):
+    return PlainTextResponse((await request.body()).decode())
+
+
+def rate_limited_app(**budgets):
+    from app.middleware import RateLimitMiddleware
+    from app.utils.rate_limit import RateLimiter
+    from settings.config import Settings
+    routes = [Route("/login/", echo_body, methods=["POST"]), Route("/", echo_body)]
+    settings = Settings(
+        rate_limit_enabled=True,
+        rate_limit_per_minute=budgets.get("default", 100),
+        rate_limit_auth_per_minute=budgets.get("expensive", 100),
+        rate_limit_auth_account_per_minute=budgets.get("account", 100),
+        rate_limit_trust_forwarded_for=True,
+    )
+    return RateLimitMiddleware(Starlette(routes=routes), limiter=RateLimiter(), settings=settings)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_account_with_retry_after():
+    app = rate_limited_app(account=2)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        for _ in range(2):
+            response = await client.post("/login/", data={"username": "Victim@example.com", "password": "x"})
+            # The middleware read the body and replayed it to the route
+            assert response.text == "username=Victim%40example.com&password=x"
+        response = await client.post("/login/", data={"username": "victim@example.com ", "password": "y"}, headers={"X-Forwarded-For": "10.0.0.9"})
+        assert response.status_code == 429
+        assert 0 < int(response.headers["retry-after"]) <= 30
+        assert (await client.post("/login/", data={"username": "other@example.com"})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_separate_budgets_per_address():
+    app = rate_limited_app(default=3, expensive=1)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        assert (await client.post("/login/", json={"email": "a@example.com"})).status_code == 200
+        assert (await client.post("/login/", json={"email": "b@example.com"})).status_code == 429
+        # Ordinary routes have their own, larger budget
+        assert (await client.get("/")).status_code == 200
+        # Another client address is not affected
+        response = await client.post("/login/", json={"email": "c@example.com"}, headers={"X-Forwarded-For": "spoofed, 10.0.0.2"})
+        assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_follows_settings_changes():
+    app = rate_limited_app(default=1)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        assert (await client.get("/")).status_code == 200
+        assert (await client.get("/")).status_code == 429
+        app.settings.rate_limit_enabled = False
+        assert (await client.get("/")).status_code == 200
@@ -0,0 +1,17 @@
+from builtins import ValueError, all, len, set
+import re
+import pytest
+from app.utils.nickname_gen import VOCABULARY_SIZE, generate_nickname, generate_nicknames
+
+def test_nickname_is_url_safe():
+    assert re.fullmatch(r"[\w-]+", generate_nickname())
+
+def test_generate_nicknames_are_distinct():
+    nicknames = generate_nicknames(50)
+    assert len(nicknames) == 50
+    assert len(set(nicknames)) == 50
+    assert all(re.fullmatch(r"[a-z]+_[a-z]+_\d{1,4}", nickname) for nickname in nicknames)
+
+def test_generate_nicknames_rejects_counts_beyond_vocabulary():
+    with pytest.raises(ValueError):
+        generate_nicknames(VOCABULARY_SIZE + 1)
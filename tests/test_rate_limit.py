@@ -0,0 +1,63 @@
+import pytest
+
+from app.utils.rate_limit import LocalRateLimitStore, RateBudget, RateLimiter, create_rate_limit_store
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingStore:
+    async def take(self, key, budget):
+        raise ConnectionError("store down")
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_refills():
+    clock = FakeClock()
+    store = LocalRateLimitStore(clock=clock)
+    budget = RateBudget(3, per_seconds=60)
+    assert [await store.take("a", budget) for _ in range(3)] == [0, 0, 0]
+    assert await store.take("a", budget) == pytest.approx(20.0)
+    assert await store.take("b", budget) == 0
+    clock.now += 20
+    assert await store.take("a", budget) == 0
+    assert await store.take("a", budget) > 0
+
+
+@pytest.mark.asyncio
+async def test_store_counts_evictions_of_drained_buckets():
+    clock = FakeClock()
+    store = LocalRateLimitStore(maxsize=2, clock=clock)
+    budget = RateBudget(3, per_seconds=60)
+    await store.take("a", budget)
+    await store.take("b", budget)
+    await store.take("c", budget)
+    assert store.stats() == {"size": 2, "evictions": 1}
+    # Refilled buckets have expired, so making room for them is not an eviction
+    clock.now += 61
+    await store.take("d", budget)
+    await store.take("e", budget)
+    assert store.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_counts_and_falls_back_to_local_store():
+    limiter = RateLimiter(shared=FailingStore())
+    budget = RateBudget(1)
+    assert await limiter.hit("a", budget) == 0
+    assert await limiter.hit("a", budget) > 0
+    assert limiter.stats() == {"allowed": 1, "rejected": 1, "shared_errors": 2, "local_buckets": 1, "local_evictions": 0}
+    limiter.clear()
+    assert await limiter.hit("a", budget) == 0
+
+
+def test_create_rate_limit_store():
+    assert create_rate_limit_store("") is None
+    assert isinstance(create_rate_limit_store("local://"), LocalRateLimitStore)
+    with pytest.raises(ValueError):
+        create_rate_limit_store("memcached://localhost")
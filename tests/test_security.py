@@ -1,7 +1,9 @@
 # test_security.py
 from builtins import RuntimeError, ValueError, isinstance, str
 import pytest
-from app.utils.security import hash_password, verify_password
+from app.utils.security import (
+    PasswordHashingBusyError, hash_password, hash_password_async, verify_password, verify_password_async
+)
 
 def test_hash_password():
     """Test that hashing password returns a bcrypt hashed string."""
@@ -65,3 +67,25 @@ def test_hash_password_internal_error(monkeypatch):
     with pytest.raises(ValueError):
         hash_password("test")
 
+@pytest.mark.asyncio
+async def test_hash_and_verify_password_async():
+    """Test that the pooled helpers produce hashes compatible with the sync helpers."""
+    hashed = await hash_password_async("secure_password")
+    assert hashed.startswith('$2b$')
+    assert verify_password("secure_password", hashed) is True
+    assert await verify_password_async("secure_password", hashed) is True
+    assert await verify_password_async("incorrect_password", hashed) is False
+
+@pytest.mark.asyncio
+async def test_verify_password_async_invalid_hash():
+    """Test that errors raised in the worker pool propagate to the caller."""
+    with pytest.raises(ValueError):
+        await verify_password_async("secure_password", "invalid_hash_format")
+
+@pytest.mark.asyncio
+async def test_hash_password_async_rejects_when_saturated(monkeypatch):
+    """Test that new jobs are rejected once the queue-depth limit is reached."""
+    monkeypatch.setattr("app.utils.security.settings.password_hash_max_pending", 0)
+    with pytest.raises(PasswordHashingBusyError):
+        await hash_password_async("secure_password")
+
@@ -0,0 +1,81 @@
+from builtins import RuntimeError, iter, len, next
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import select
+
+from app.models.email_outbox_model import EmailOutbox, EmailOutboxStatus
+from app.services.email_outbox_service import EmailOutboxService, EmailOutboxWorker
+from app.services.user_service import UserService
+from tests.conftest import AsyncTestingSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+def make_worker(email_service, **options):
+    return EmailOutboxWorker(AsyncTestingSessionLocal, lambda: email_service, **options)
+
+async def outbox_rows(db_session):
+    db_session.expire_all()
+    result = await db_session.execute(select(EmailOutbox))
+    return result.scalars().all()
+
+# Test that registering a user queues the verification email instead of sending it
+async def test_create_user_queues_verification_email(db_session, email_service):
+    user = await UserService.create(db_session, {"email": "outbox_user@example.com", "password": "ValidPassword123!"}, email_service)
+    assert user is not None
+    user_id, email = user.id, user.email
+    rows = await outbox_rows(db_session)
+    assert len(rows) == 1
+    assert rows[0].email_type == "email_verification"
+    assert rows[0].recipient == email
+    assert str(user_id) in rows[0].context["verification_url"]
+
+# Test that the worker sends due emails and marks them sent
+async def test_worker_sends_and_marks_sent(db_session):
+    EmailOutboxService.enqueue(db_session, "email_verification", "a@example.com", {"email": "a@example.com", "name": "A", "verification_url": "http://x"})
+    await db_session.commit()
+    email_service = AsyncMock()
+    assert await make_worker(email_service).process_batch() == 1
+    email_service.send_user_email.assert_awaited_once()
+    rows = await outbox_rows(db_session)
+    assert rows[0].status == EmailOutboxStatus.SENT
+    assert rows[0].sent_at is not None
+    assert await make_worker(email_service).process_batch() == 0
+
+# Test that the worker resolves the email service for every batch, so a reload reaches it
+async def test_worker_resolves_email_service_per_batch(db_session):
+    services = [AsyncMock(), AsyncMock()]
+    current = iter(services)
+    worker = EmailOutboxWorker(AsyncTestingSessionLocal, lambda: next(current))
+    for recipient in ("d@example.com", "e@example.com"):
+        EmailOutboxService.enqueue(db_session, "email_verification", recipient, {"email": recipient})
+        await db_session.commit()
+        assert await worker.process_batch() == 1
+    assert [service.send_user_email.await_count for service in services] == [1, 1]
+
+# Test that failures are retried later and dead-lettered after the last attempt
+async def test_worker_retries_then_dead_letters(db_session):
+    EmailOutboxService.enqueue(db_session, "email_verification", "b@example.com", {"email": "b@example.com"})
+    await db_session.commit()
+    email_service = AsyncMock()
+    email_service.send_user_email.side_effect = RuntimeError("smtp down")
+
+    worker = make_worker(email_service, max_attempts=2, backoff_seconds=0, max_backoff_seconds=0)
+    assert await worker.process_batch() == 1
+    rows = await outbox_rows(db_session)
+    assert rows[0].status == EmailOutboxStatus.PENDING
+    assert rows[0].attempts == 1
+    assert rows[0].last_error == "smtp down"
+
+    assert await worker.process_batch() == 1
+    rows = await outbox_rows(db_session)
+    assert rows[0].status == EmailOutboxStatus.DEAD
+    assert rows[0].attempts == 2
+
+# Test that claimed emails are hidden from other workers for the lease duration
+async def test_claim_batch_leases_rows(db_session):
+    EmailOutboxService.enqueue(db_session, "email_verification", "c@example.com", {"email": "c@example.com"})
+    await db_session.commit()
+    async with AsyncTestingSessionLocal() as session:
+        assert len(await EmailOutboxService.claim_batch(session, 10, lease_seconds=60)) == 1
+        assert len(await EmailOutboxService.claim_batch(session, 10, lease_seconds=60)) == 0
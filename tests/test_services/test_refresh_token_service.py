@@ -0,0 +1,63 @@
+from builtins import len, range, set
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select, update
+from app.models.refresh_token_model import RefreshToken
+from app.services.refresh_token_service import RefreshTokenService
+
+pytestmark = pytest.mark.asyncio
+
+async def issue_token(db_session, user):
+    token = RefreshTokenService.issue(db_session, user.id)
+    await db_session.commit()
+    return token
+
+async def test_rotate_issues_successor(db_session, verified_user):
+    token = await issue_token(db_session, verified_user)
+    grant = await RefreshTokenService.rotate(db_session, token)
+    assert grant is not None
+    assert grant.email == verified_user.email
+    assert grant.refresh_token != token
+
+async def test_only_digest_is_stored(db_session, verified_user):
+    token = await issue_token(db_session, verified_user)
+    stored = (await db_session.execute(select(RefreshToken.token_hash))).scalars().all()
+    assert len(stored) == 1
+    assert len(stored[0]) == 32
+    assert token.encode() not in stored
+
+async def test_reuse_revokes_family(db_session, verified_user):
+    token = await issue_token(db_session, verified_user)
+    successor = (await RefreshTokenService.rotate(db_session, token)).refresh_token
+    assert await RefreshTokenService.rotate(db_session, token) is None
+    # The replay revoked the legitimate successor too
+    assert await RefreshTokenService.rotate(db_session, successor) is None
+
+async def test_unknown_token_is_rejected(db_session, verified_user):
+    assert await RefreshTokenService.rotate(db_session, "not-a-token") is None
+
+async def test_locked_user_cannot_refresh(db_session, locked_user):
+    token = await issue_token(db_session, locked_user)
+    assert await RefreshTokenService.rotate(db_session, token) is None
+
+async def test_revoke_ends_family_of_own_token_only(db_session, verified_user):
+    token = await issue_token(db_session, verified_user)
+    await RefreshTokenService.revoke(db_session, token, "someone.else@example.com")
+    successor = (await RefreshTokenService.rotate(db_session, token)).refresh_token
+    await RefreshTokenService.revoke(db_session, token, verified_user.email)
+    await db_session.commit()
+    assert await RefreshTokenService.rotate(db_session, successor) is None
+
+async def test_purge_deletes_only_tokens_past_retention(db_session, verified_user):
+    expired, revoked, consumed, live = [await issue_token(db_session, verified_user) for _ in range(4)]
+    long_ago = datetime.now(timezone.utc) - timedelta(days=3)
+    digest = RefreshTokenService._digest
+    await db_session.execute(update(RefreshToken).where(RefreshToken.token_hash == digest(expired)).values(expires_at=long_ago))
+    await db_session.execute(update(RefreshToken).where(RefreshToken.token_hash == digest(revoked)).values(revoked_at=long_ago))
+    await db_session.commit()
+    await RefreshTokenService.rotate(db_session, consumed)
+
+    assert await RefreshTokenService.purge(db_session, timedelta(days=1), batch_size=1) == 2
+    remaining = set((await db_session.execute(select(RefreshToken.token_hash))).scalars().all())
+    assert digest(expired) not in remaining and digest(revoked) not in remaining
+    assert digest(consumed) in remaining and digest(live) in remaining
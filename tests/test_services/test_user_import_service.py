@@ -0,0 +1,64 @@
+from builtins import len
+import pytest
+from sqlalchemy import func, select
+from app.models.email_outbox_model import EmailOutbox
+from app.models.user_model import User
+from app.services.user_import_service import UserImportService
+from app.utils.import_stream import ImportRow
+
+pytestmark = pytest.mark.asyncio
+
+async def rows_of(*rows):
+    for row in rows:
+        yield row
+
+async def test_import_users_creates_valid_rows_and_reports_the_rest(db_session, email_service, user, monkeypatch):
+    monkeypatch.setattr("app.services.user_import_service.settings.user_import_batch_size", 2)
+    report = await UserImportService.import_users(db_session, rows_of(
+        ImportRow(1, data={"email": "import1@example.com", "password": "Secret*1234", "first_name": "Ann"}),
+        ImportRow(2, data={"email": user.email, "password": "Secret*1234"}),
+        ImportRow(3, data={"email": "not-an-email", "password": "Secret*1234"}),
+        ImportRow(4, error="Invalid JSON"),
+        ImportRow(5, data={"email": "import1@example.com", "password": "Secret*1234"}),
+        ImportRow(6, data={"email": "import2@example.com", "password": "Secret*1234"}),
+    ), email_service)
+
+    assert report.created == 2
+    assert report.failed == 4
+    errors = {error.row: error.error for error in report.errors}
+    assert errors[2] == "Email already exists"
+    assert errors[3].startswith("email")
+    assert errors[4] == "Invalid JSON"
+    # Row 5 repeats row 1, which an earlier batch already committed
+    assert errors[5] == "Email already exists"
+
+    imported = (await db_session.execute(select(User).where(User.email.in_(["import1@example.com", "import2@example.com"])))).scalars().all()
+    assert len(imported) == 2
+    assert all(u.nickname and u.verification_token and u.hashed_password.startswith("$2b$") for u in imported)
+    assert all(u.is_locked is False and u.email_verified is False and u.failed_login_attempts == 0 for u in imported)
+    queued = await db_session.scalar(select(func.count()).select_from(EmailOutbox).where(EmailOutbox.recipient.in_(["import1@example.com", "import2@example.com"])))
+    assert queued == 2
+
+async def test_import_report_caps_listed_errors(db_session, email_service, monkeypatch):
+    monkeypatch.setattr("app.services.user_import_service.settings.user_import_max_errors", 1)
+    report = await UserImportService.import_users(db_session, rows_of(ImportRow(1, error="bad"), ImportRow(2, error="bad")), email_service)
+    assert report.failed == 2
+    assert len(report.errors) == 1
+    assert report.errors_truncated is True
+
+async def test_import_hashes_passwords_outside_the_transaction(db_session, email_service, monkeypatch):
+    hash_passwords = UserImportService._hash_passwords.__func__
+    in_transaction = []
+
+    async def checked_hash_passwords(cls, passwords):
+        in_transaction.append(db_session.in_transaction())
+        return await hash_passwords(cls, passwords)
+
+    monkeypatch.setattr(UserImportService, "_hash_passwords", classmethod(checked_hash_passwords))
+    monkeypatch.setattr("app.services.user_import_service.settings.user_import_batch_size", 1)
+    report = await UserImportService.import_users(db_session, rows_of(
+        ImportRow(1, data={"email": "import1@example.com", "password": "Secret*1234"}),
+        ImportRow(2, data={"email": "import2@example.com", "password": "Secret*1234"}),
+    ), email_service)
+    assert report.created == 2
+    assert in_transaction == [False, False]
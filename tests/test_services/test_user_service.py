@@ -1,9 +1,15 @@
-from builtins import range
+from builtins import RuntimeError, iter, len, max, next, range, set
+import asyncio
+from datetime import timedelta
 import pytest
-from sqlalchemy import select
+from sqlalchemy import select, text
+from app.database import Database, count_round_trips
 from app.dependencies import get_settings
 from app.models.user_model import User
-from app.services.user_service import UserService
+from app.schemas.pagination_schema import CountMode
+from app.services.user_service import DuplicateUserError, LoginStatus, UserService, UserVersionMismatchError
+from tests.conftest import AsyncTestingSessionLocal, engine
+from app.utils.pagination_cursor import PREV, PageCursor
 
 pytestmark = pytest.mark.asyncio
 
@@ -17,6 +23,15 @@ async def test_create_user_with_valid_data(db_session, email_service):
     assert user is not None
     assert user.email == user_data["email"]
 
+# Test that nickname allocation skips taken names and checks all candidates in one query
+async def test_allocate_nicknames_skips_taken_names(db_session, user, monkeypatch):
+    candidates = [user.nickname, "free_nickname_1", "free_nickname_2"]
+    monkeypatch.setattr("app.services.user_service.generate_nicknames", lambda count: candidates)
+    with count_round_trips() as counter:
+        nicknames = await UserService.allocate_nicknames(db_session, 2)
+    assert nicknames == ["free_nickname_1", "free_nickname_2"]
+    assert counter.statements == 1
+
 # Test creating a user with invalid data
 async def test_create_user_with_invalid_data(db_session, email_service):
     user_data = {
@@ -70,6 +85,16 @@ async def test_update_user_invalid_data(db_session, user):
     updated_user = await UserService.update(db_session, user.id, {"email": "invalidemail"})
     assert updated_user is None
 
+# Test that taking another user's email or nickname is reported as a duplicate
+async def test_update_user_to_a_taken_email_or_nickname(db_session, user, verified_user):
+    user_id, version, taken_nickname = user.id, user.updated_at, verified_user.nickname
+    with pytest.raises(DuplicateUserError) as excinfo:
+        await UserService.update(db_session, user_id, {"email": verified_user.email})
+    assert excinfo.value.field == "email"
+    with pytest.raises(DuplicateUserError) as excinfo:
+        await UserService.update(db_session, user_id, {"nickname": taken_nickname}, expected_updated_at=version)
+    assert excinfo.value.field == "nickname"
+
 # Test deleting a user who exists
 async def test_delete_user_exists(db_session, user):
     deletion_success = await UserService.delete(db_session, user.id)
@@ -89,6 +114,66 @@ async def test_list_users_with_pagination(db_session, users_with_same_role_50_us
     assert len(users_page_2) == 10
     assert users_page_1[0].id != users_page_2[0].id
 
+# Test walking every page forwards and backwards with keyset pagination
+async def test_list_users_by_cursor(db_session, users_with_same_role_50_users):
+    seen = []
+    users, next_cursor, prev_cursor = await UserService.list_users_by_cursor(db_session, limit=15)
+    assert prev_cursor is None
+    seen.extend(users)
+    while next_cursor:
+        users, next_cursor, prev_cursor = await UserService.list_users_by_cursor(db_session, limit=15, cursor=next_cursor)
+        assert prev_cursor is not None
+        seen.extend(users)
+    assert len(seen) == 50
+    assert len({user.id for user in seen}) == 50
+
+    users, next_cursor, prev_cursor = await UserService.list_users_by_cursor(db_session, limit=15, cursor=PageCursor(PREV))
+    assert next_cursor is None
+    assert [user.id for user in users] == [user.id for user in seen[-15:]]
+    users, _, _ = await UserService.list_users_by_cursor(db_session, limit=15, cursor=prev_cursor)
+    assert [user.id for user in users] == [user.id for user in seen[-30:-15]]
+
+# Test the count strategies used for listing totals
+async def test_count_users_modes(db_session, users_with_same_role_50_users):
+    assert await UserService.count_users(db_session, CountMode.EXACT) == (50, False)
+
+    UserService.invalidate_count_cache()
+    assert await UserService.count_users(db_session, CountMode.CACHED) == (50, False)
+    await UserService.delete(db_session, users_with_same_role_50_users[0].id)
+    assert await UserService.count_users(db_session, CountMode.CACHED) == (49, False)
+
+    await db_session.execute(text("ANALYZE users"))
+    estimate, estimated = await UserService.count_users(db_session, CountMode.ESTIMATED)
+    assert estimated is True
+    assert estimate == 49
+
+# Test that a page and its total come back from a single statement
+async def test_list_users_page_single_statement(db_session, users_with_same_role_50_users):
+    with count_round_trips() as counter:
+        user_page = await UserService.list_users_page(db_session, limit=10, skip=45)
+    assert len(user_page.items) == 5
+    assert user_page.total == 50
+    assert user_page.total_estimated is False
+    assert counter.statements == 1
+
+    user_page = await UserService.list_users_page(db_session, limit=20)
+    assert user_page.total == 50
+    assert len(user_page.items) == 20
+    assert user_page.next_cursor is not None
+    assert user_page.prev_cursor is None
+
+# Test that a read-only transaction whose reads fail is rolled back, not committed
+async def test_read_only_transaction_rolls_back_on_error():
+    async with AsyncTestingSessionLocal() as session:
+        with count_round_trips() as counter:
+            with pytest.raises(RuntimeError):
+                async with UserService._read_only_transaction(session):
+                    await session.execute(select(User.id).limit(1))
+                    raise RuntimeError("read failed")
+        assert session.in_transaction() is False
+    assert counter.commits == 0
+    assert counter.rollbacks == 1
+
 # Test registering a user with valid data
 async def test_register_user_with_valid_data(db_session, email_service):
     user_data = {
@@ -156,3 +241,147 @@ async def test_unlock_user_account(db_session, locked_user):
     assert unlocked, "The account should be unlocked"
     refreshed_user = await UserService.get_by_id(db_session, locked_user.id)
     assert not refreshed_user.is_locked, "The user should no longer be locked"
+
+# Test that an export walks the table in keyset chunks without losing or repeating rows
+async def test_export_users_in_chunks(db_session, users_with_same_role_50_users, monkeypatch):
+    monkeypatch.setattr("app.services.user_service.settings.user_export_chunk_rows", 20)
+    monkeypatch.setattr("app.services.user_service.settings.user_export_fetch_rows", 7)
+    batches = [rows async for rows in UserService.export_users(AsyncTestingSessionLocal, ["email", "role"])]
+    emails = [row["email"] for rows in batches for row in rows]
+    assert len(emails) == 50
+    assert len(set(emails)) == 50
+    assert max(len(rows) for rows in batches) <= 7
+
+    batches = [rows async for rows in UserService.export_users(AsyncTestingSessionLocal, ["email"], is_locked=True)]
+    assert batches == []
+
+# Test that repeated lookups are served from the user cache until the user changes
+async def test_user_cache_serves_lookups_and_is_invalidated(db_session, user):
+    await UserService.get_by_email(db_session, user.email)
+    with count_round_trips() as counter:
+        cached = await UserService.get_by_id(db_session, user.id)
+        assert (await UserService.get_by_nickname(db_session, user.nickname)) is cached
+    assert counter.statements == 0
+    assert cached.email == user.email
+
+    await UserService.update(db_session, user.id, {"first_name": "Cached"})
+    db_session.expunge_all()
+    assert (await UserService.get_by_id(db_session, user.id)).first_name == "Cached"
+    assert UserService.user_cache_stats()["hit_ratio"] > 0
+
+# Test that rows read from a replica do not fill the user cache
+async def test_replica_reads_do_not_fill_the_user_cache(user):
+    async with Database._create_session_factory(engine, replica=True)() as session:
+        assert (await UserService.get_by_id(session, user.id)).id == user.id
+    assert UserService.user_cache_stats()["size"] == 0
+
+# Test that a user served from the cache can be modified and committed
+async def test_cached_user_can_be_modified(db_session, user):
+    await UserService.get_by_id(db_session, user.id)
+    db_session.expunge_all()
+    cached = await UserService.get_by_id(db_session, user.id)
+    cached.first_name = "Changed"
+    await db_session.commit()
+    db_session.expunge_all()
+    result = await db_session.execute(select(User.first_name).where(User.id == user.id))
+    assert result.scalar() == "Changed"
+
+# Test that a conditional update refuses to overwrite a newer version
+async def test_update_with_stale_version_raises(db_session, user):
+    with pytest.raises(UserVersionMismatchError):
+        await UserService.update(db_session, user.id, {"first_name": "Stale"}, expected_updated_at=user.updated_at - timedelta(seconds=1))
+    updated = await UserService.update(db_session, user.id, {"first_name": "Fresh"}, expected_updated_at=user.updated_at)
+    assert updated.first_name == "Fresh"
+
+async def _cache_miss(field, value):
+    return None
+
+# Test that reads share the session's transaction instead of committing after each statement
+async def test_reads_do_not_commit(db_session, user, monkeypatch):
+    monkeypatch.setattr(UserService._user_cache, "get", _cache_miss)
+    await db_session.rollback()
+    with count_round_trips() as counter:
+        assert await UserService.get_by_id(db_session, user.id) is not None
+        assert await UserService.get_by_email(db_session, user.email) is not None
+        await UserService.list_users(db_session)
+    assert counter.as_dict() == {"statements": 3, "begins": 1, "commits": 0, "rollbacks": 0}
+
+# Test that each mutation is one UPDATE ... RETURNING that refreshes the session's copy
+async def test_mutations_are_single_statements(db_session, locked_user):
+    await db_session.commit()
+    with count_round_trips() as counter:
+        updated = await UserService.update(db_session, locked_user.id, {"first_name": "Single"})
+    assert counter.statements == 1
+    assert updated is locked_user
+    assert locked_user.first_name == "Single"
+
+    with count_round_trips() as counter:
+        assert await UserService.unlock_user_account(db_session, locked_user.id)
+    assert counter.statements == 1
+    assert locked_user.is_locked is False
+    assert locked_user.failed_login_attempts == 0
+
+# Test that mutations with unmet preconditions change nothing
+async def test_mutation_preconditions(db_session, user):
+    user.verification_token = "once"
+    await db_session.commit()
+    assert not await UserService.unlock_user_account(db_session, user.id)
+    assert not await UserService.verify_email_with_token(db_session, user.id, "wrong")
+    assert await UserService.verify_email_with_token(db_session, user.id, "once")
+    assert user.email_verified is True
+    assert not await UserService.verify_email_with_token(db_session, user.id, "once")
+
+# Test that parallel failed logins lock the account at exactly max_login_attempts
+async def test_parallel_failed_logins_lock_exactly(db_session, verified_user):
+    max_attempts = get_settings().max_login_attempts
+
+    async def attempt():
+        async with AsyncTestingSessionLocal() as session:
+            return (await UserService.authenticate(session, verified_user.email, "wrongpassword")).status
+
+    statuses = await asyncio.gather(*(attempt() for _ in range(max_attempts * 3)))
+    assert statuses.count(LoginStatus.INVALID) >= max_attempts
+    result = await db_session.execute(select(User.failed_login_attempts, User.is_locked).where(User.id == verified_user.id))
+    assert tuple(result.one()) == (max_attempts, True)
+    assert (await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")).status == LoginStatus.LOCKED
+
+# Test that a successful login is one lookup and one UPDATE, left for the caller to commit
+async def test_authenticate_round_trips(db_session, verified_user):
+    await db_session.commit()
+    with count_round_trips() as counter:
+        result = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")
+    assert result.status == LoginStatus.SUCCESS
+    assert result.user_id == verified_user.id
+    assert counter.as_dict() == {"statements": 2, "begins": 2, "commits": 0, "rollbacks": 1}
+    assert (await UserService.authenticate(db_session, verified_user.email, "wrong")).status == LoginStatus.INVALID
+
+# Test that creation reports a taken email and retries a taken nickname
+async def test_create_user_conflicts(db_session, user, email_service, monkeypatch):
+    with pytest.raises(DuplicateUserError) as excinfo:
+        await UserService.create(db_session, {"email": user.email, "password": "ValidPassword123!"}, email_service)
+    assert excinfo.value.field == "email"
+
+    nicknames = iter([user.nickname, "fresh_nickname_1"])
+    monkeypatch.setattr("app.services.user_service.generate_nickname", lambda: next(nicknames))
+    created = await UserService.create(db_session, {"email": "fresh@example.com", "password": "ValidPassword123!"}, email_service)
+    assert created.nickname == "fresh_nickname_1"
+
+# Test that creation is one INSERT of the user plus its queued email, committed once
+async def test_create_user_round_trips(db_session, email_service):
+    await db_session.commit()
+    with count_round_trips() as counter:
+        user = await UserService.create(db_session, {"email": "one_trip@example.com", "password": "ValidPassword123!"}, email_service)
+    assert user is not None and user.created_at is not None
+    assert counter.as_dict() == {"statements": 2, "begins": 1, "commits": 1, "rollbacks": 0}
+
+# Test that concurrent registrations of one email create exactly one user
+async def test_concurrent_create_same_email(email_service):
+    async def register():
+        async with AsyncTestingSessionLocal() as session:
+            try:
+                return await UserService.create(session, {"email": "race@example.com", "password": "ValidPassword123!"}, email_service)
+            except DuplicateUserError:
+                return None
+
+    results = await asyncio.gather(*(register() for _ in range(5)))
+    assert len([user for user in results if user is not None]) == 1
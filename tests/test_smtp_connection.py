@@ -0,0 +1,46 @@
+from builtins import len, range
+import asyncio
+
+import pytest
+
+from app.services.email_service import EmailService
+from app.utils.template_manager import TemplateManager
+
+pytestmark = pytest.mark.asyncio
+
+async def test_send_email_reuses_session(smtp_server, smtp_client):
+    for index in range(3):
+        await smtp_client.send_email("Subject", "<p>Hello</p>", f"user{index}@example.com")
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+
+async def test_send_email_caps_concurrency(smtp_server, smtp_client):
+    await asyncio.gather(*(smtp_client.send_email("Subject", "<p>Hello</p>", "user@example.com") for _ in range(10)))
+    assert len(smtp_server.messages) == 10
+    assert smtp_server.connections <= smtp_client.pool_size
+
+async def test_send_email_reconnects_after_server_drops_session(smtp_server, smtp_client):
+    await smtp_client.send_email("Subject", "<p>Hello</p>", "user@example.com")
+    smtp_server.drop_connections()
+    await asyncio.sleep(0.05)
+    await smtp_client.send_email("Subject", "<p>Hello again</p>", "user@example.com")
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 2
+
+async def test_send_email_reconnects_after_idle_timeout(smtp_server, smtp_client):
+    smtp_client.idle_timeout = 0
+    await smtp_client.send_email("Subject", "<p>Hello</p>", "user@example.com")
+    await smtp_client.send_email("Subject", "<p>Hello</p>", "user@example.com")
+    assert smtp_server.connections == 2
+
+async def test_email_service_sends_through_pool(smtp_server, smtp_client):
+    email_service = EmailService(template_manager=TemplateManager(), smtp_client=smtp_client)
+    await email_service.send_user_email({"email": "test@example.com", "name": "Test User", "verification_url": "http://example.com/verify"}, 'email_verification')
+    assert b"http://example.com/verify" in smtp_server.messages[0]
+
+@pytest.mark.slow
+async def test_smtp_pool_reuses_sessions_under_load(smtp_server, smtp_client):
+    await asyncio.gather(*(smtp_client.send_email("Subject", "<p>Hello</p>", "user@example.com") for _ in range(500)))
+    assert len(smtp_server.messages) == 500
+    # Sessions are only replaced when they reach their message limit
+    assert smtp_server.connections <= smtp_client.pool_size + 500 // smtp_client.max_messages_per_connection
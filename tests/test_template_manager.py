@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from app.utils.template_manager import TemplateManager
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    (tmp_path / "header.md").write_text("# Header\n")
+    (tmp_path / "footer.md").write_text("Footer\n")
+    (tmp_path / "greeting.md").write_text("Hello {name},\n\n[Open]({url})\n")
+    return tmp_path
+
+def make_manager(templates_dir, auto_reload=False):
+    manager = TemplateManager(auto_reload=auto_reload)
+    manager.templates_dir = templates_dir
+    return manager
+
+def test_render_template_fills_placeholders():
+    html = TemplateManager().render_template("email_verification", name="Ann", verification_url="http://example.com/verify/1")
+    assert "Hello Ann," in html
+    assert 'href="http://example.com/verify/1"' in html
+    assert '<p style="' in html
+
+def test_render_template_escapes_values(templates_dir):
+    html = make_manager(templates_dir).render_template("greeting", name="<b>Eve</b>", url='http://x/"onmouseover="')
+    assert "&lt;b&gt;Eve&lt;/b&gt;" in html
+    assert 'href="http://x/&quot;onmouseover=&quot;"' in html
+
+def test_render_template_missing_value_raises(templates_dir):
+    with pytest.raises(KeyError):
+        make_manager(templates_dir).render_template("greeting", name="Ann")
+
+def test_template_is_compiled_once(templates_dir, monkeypatch):
+    manager = make_manager(templates_dir)
+    manager.render_template("greeting", name="Ann", url="http://x")
+    monkeypatch.setattr(manager, "_read_template", lambda filename: pytest.fail("template re-read from disk"))
+    manager.render_template("greeting", name="Bob", url="http://y")
+
+def test_auto_reload_picks_up_changed_template(templates_dir):
+    manager = make_manager(templates_dir, auto_reload=True)
+    assert "Hello Ann" in manager.render_template("greeting", name="Ann", url="http://x")
+    path = templates_dir / "greeting.md"
+    path.write_text("Goodbye {name}\n")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert "Goodbye Ann" in manager.render_template("greeting", name="Ann")
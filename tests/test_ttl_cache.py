@@ -0,0 +1,37 @@
+from app.utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, clock=clock)
+    cache.set("users", 42)
+    assert cache.get("users") == 42
+    clock.now = 10
+    assert cache.get("users") is None
+    assert len(cache) == 0
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(ttl_seconds=10, maxsize=2, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+def test_ttl_cache_invalidate():
+    cache = TTLCache(ttl_seconds=10)
+    cache.set("users", 42)
+    cache.invalidate("users")
+    cache.invalidate("missing")
+    assert cache.get("users") is None